@@ -0,0 +1,72 @@
+"""
+Background preloading of the sounds, images and music a program uses
+Assets are loaded on a separate thread into Pygame Zero's own loader
+caches, so sounds.brake and the like find them already decoded instead
+of loading them in the middle of a frame
+"""
+
+import threading
+import time
+
+import pgzero.music
+from pgzero import loaders
+
+READ_SIZE = 1 << 20  # Bytes read at a time when warming a music file
+
+
+class Preloader(threading.Thread):
+    """Thread that loads a list of assets once, timing each one
+
+    A program that asks for an asset before it is loaded just loads it
+    itself, as it would have without the preloader, so the frame loop
+    never waits on this thread
+    """
+
+    def __init__(self, sounds=(), images=(), music=()):
+        super().__init__(name="preloader", daemon=True)
+        self.assets = ([("sounds", name) for name in sounds] +
+                       [("images", name) for name in images] +
+                       [("music", name) for name in music])
+        self.timings = {}  # "sounds/brake" -> seconds taken to load
+        self.errors = {}  # "sounds/brake" -> exception raised loading it
+
+    def run(self):
+        for kind, name in self.assets:
+            key = f"{kind}/{name}"
+            start = time.perf_counter()
+            try:
+                load(kind, name)
+            except Exception as e:
+                self.errors[key] = e
+            self.timings[key] = time.perf_counter() - start
+
+    def report(self):
+        """Return a line per asset loaded so far, with its load time"""
+        lines = []
+        for key, seconds in self.timings.items():
+            if key in self.errors:
+                lines.append(f"{key}: failed ({self.errors[key]})")
+            else:
+                lines.append(f"{key}: {seconds * 1000:.1f} ms")
+        return lines
+
+
+def load(kind, name):
+    """Load one asset into the cache its loader keeps"""
+    if kind == "music":
+        # Music is streamed as it plays, so there is nothing to decode
+        # ahead; finding the file and reading it through once saves the
+        # lookup and the disk access when it starts
+        path = pgzero.music._loader.load(name)
+        with open(path, "rb") as f:
+            while f.read(READ_SIZE):
+                pass
+    else:
+        getattr(loaders, kind).load(name)
+
+
+def preload(sounds=(), images=(), music=()):
+    """Start loading assets in the background, returning the Preloader"""
+    preloader = Preloader(sounds, images, music)
+    preloader.start()
+    return preloader
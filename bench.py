@@ -0,0 +1,114 @@
+"""
+Headless frame-time benchmark for the Pygame Zero programs
+Each program is started the way a player would start it, then its
+update() and draw() are timed for a fixed number of frames
+
+    python bench.py                   table for every program
+    python bench.py train --json      JSON for the train simulator
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import programs
+
+
+def percentile(ordered, p):
+    """Nearest-rank percentile of an already sorted list"""
+    rank = max(int(round(p / 100 * len(ordered))), 1)
+    return ordered[rank - 1]
+
+
+def run(name, frames, warmup):
+    """Benchmark one program, returning its results as a dict"""
+    mod = programs.load(name)
+    update = getattr(mod, "update", lambda: None)
+    draw = mod.draw
+    programs.start(name, mod)
+
+    for _ in range(warmup):
+        update()
+        draw()
+
+    # Timing pass
+    clock = time.perf_counter_ns
+    update_ns = []
+    draw_ns = []
+    for _ in range(frames):
+        t0 = clock()
+        update()
+        t1 = clock()
+        draw()
+        t2 = clock()
+        update_ns.append(t1 - t0)
+        draw_ns.append(t2 - t1)
+
+    # Allocation pass, kept apart because tracing slows everything down
+    blocks = sys.getallocatedblocks()
+    tracemalloc.start()
+    transient = 0
+    for _ in range(frames):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        update()
+        draw()
+        transient += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    blocks = sys.getallocatedblocks() - blocks
+
+    frame_ms = sorted((u + d) / 1e6 for u, d in zip(update_ns, draw_ns))
+    return {
+        "program": name,
+        "frames": frames,
+        "mean_ms": sum(frame_ms) / frames,
+        "p50_ms": percentile(frame_ms, 50),
+        "p95_ms": percentile(frame_ms, 95),
+        "p99_ms": percentile(frame_ms, 99),
+        "update_ms": sum(update_ns) / frames / 1e6,
+        "draw_ms": sum(draw_ns) / frames / 1e6,
+        "alloc_bytes_per_frame": transient / frames,
+        "blocks_per_frame": blocks / frames,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("programs", nargs="*",
+                        help="any of " + ", ".join(programs.PROGRAMS) +
+                        " (default: all)")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--warmup", type=int, default=60)
+    parser.add_argument("--json", action="store_true",
+                        help="print one JSON object per program")
+    args = parser.parse_args()
+    for name in args.programs:
+        if name not in programs.PROGRAMS:
+            parser.error(f"unknown program {name!r}")
+
+    # Keep pygame's greeting out of machine-readable output
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    programs.use_dummy_drivers()
+    results = [run(name, args.frames, args.warmup)
+               for name in args.programs or programs.PROGRAMS]
+
+    if args.json:
+        for result in results:
+            print(json.dumps(result))
+        return
+
+    print(f"{'program':10} {'mean':>7} {'p50':>7} {'p95':>7} {'p99':>7} "
+          f"{'update':>7} {'draw':>7} {'alloc B':>9} {'blocks':>7}")
+    for r in results:
+        print(f"{r['program']:10} {r['mean_ms']:7.3f} {r['p50_ms']:7.3f} "
+              f"{r['p95_ms']:7.3f} {r['p99_ms']:7.3f} {r['update_ms']:7.3f} "
+              f"{r['draw_ms']:7.3f} {r['alloc_bytes_per_frame']:9.0f} "
+              f"{r['blocks_per_frame']:7.2f}")
+    print("times in ms per frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,17 @@
-import pgzrun
+import game_loop
+game_loop.prepare(__name__)  # Set up as a Pygame Zero program if run
+import math
 import pygame
 from pygame import Rect
-import math
+from collections import OrderedDict
+
+import numpy as np
 from pgzero import music
 from pgzero.screen import Screen
 
+import assets
+from text_cache import draw_text
+
 WIDTH = 600
 HEIGHT = 700
 TITLE = "Carousel"
@@ -27,12 +34,43 @@ COLORS = [
 
 CIRCLE_RADIUS = 220
 CARRIAGE_RADIUS = 170  # distance from center to carriage
+# Rings of carriages as (distance from center, carriage count); colors
+# repeat around each ring. For a stress test try e.g.
+# [(60, 24), (100, 48), (140, 96), (180, 160), (215, 240)]
+RINGS = [(CARRIAGE_RADIUS, len(COLORS))]
 CARRIAGE_WIDTH = 45
 CARRIAGE_HEIGHT = 15
 CENTER_X = WIDTH // 2
 CENTER_Y = HEIGHT // 2
 BUTTON_RECT = Rect(240, 580, 120, 40)
 
+# Find and read in the music while the first frames draw
+preloader = (assets.preload(music=("carousel",))
+             if game_loop.running() else None)
+
+# Rotated carriage sprites, one list per color indexed by angle step.
+# Sprites are made on first use; whole colors are dropped, least recently
+# used first, once the atlas grows past its memory limit.
+ANGLE_STEP = 0.5  # degrees
+ANGLE_STEPS = round(360 / ANGLE_STEP)
+# Largest a rotated carriage sprite gets, at 45 degrees, in bytes
+SPRITE_MAX_BYTES = math.ceil(
+    (CARRIAGE_WIDTH + CARRIAGE_HEIGHT) / math.sqrt(2) + 1) ** 2 * 4
+# Room for every color at every angle, so a full turn drops none of them
+ATLAS_MEMORY_LIMIT = len(COLORS) * ANGLE_STEPS * SPRITE_MAX_BYTES
+atlas = OrderedDict()
+atlas_bytes = 0
+# Half the width and height of a rotated sprite, the same for any color
+sprite_half_sizes = np.zeros((ANGLE_STEPS, 2), dtype=int)
+
+# Every carriage's ring radius, angle around the ring and color
+carriage_radii = np.concatenate(
+    [np.full(count, radius, dtype=float) for radius, count in RINGS])
+carriage_offsets = np.concatenate(
+    [np.arange(count) * 360 / count for _, count in RINGS])
+carriage_colors = [COLORS[i % len(COLORS)]
+                   for _, count in RINGS for i in range(count)]
+
 rotation = 270.0  # start with magenta at the top (270° in screen coordinates)
 running = False
 screen: Screen
@@ -56,28 +94,57 @@ def draw():
     btn_color = (200, 60, 60) if running else (60, 180, 60)
     screen.draw.filled_rect(BUTTON_RECT, btn_color)
     screen.draw.rect(BUTTON_RECT, BLACK)
-    screen.draw.text(label, center=BUTTON_RECT.center,
-                     fontsize=24, color=WHITE)
+    draw_text(screen, label, 24, WHITE, center=BUTTON_RECT.center)
 
     # Center hub: static black circle
     screen.draw.filled_circle((CENTER_X, CENTER_Y - 80), 12, BLACK)
 
-    # Draw each carriage as a rotated rectangle tangent to the circle
-    for i, color in enumerate(COLORS):
-        angle_deg = rotation + i * 45
-        angle_rad = math.radians(angle_deg)
-
-        x = CENTER_X + CARRIAGE_RADIUS * math.cos(angle_rad)
-        y = CENTER_Y - 80 + CARRIAGE_RADIUS * math.sin(angle_rad)
-
+    # Draw each carriage as a rotated rectangle tangent to the circle,
+    # placing all of them in one pass and blitting them in one batch
+    angles = rotation + carriage_offsets
+    angles_rad = np.radians(angles)
+    centers = np.empty((len(angles), 2), dtype=int)
+    centers[:, 0] = CENTER_X + carriage_radii * np.cos(angles_rad)
+    centers[:, 1] = CENTER_Y - 80 + carriage_radii * np.sin(angles_rad)
+
+    # Rotate so the long axis lies tangent to the circle
+    steps = np.rint((90 - angles) / ANGLE_STEP).astype(int) % ANGLE_STEPS
+    sprites = [carriage_sprite(color, step)
+               for color, step in zip(carriage_colors, steps.tolist())]
+    corners = centers - sprite_half_sizes[steps]
+    screen.surface.blits(zip(sprites, corners.tolist()), doreturn=False)
+
+
+def carriage_sprite(color, step):
+    """Return a carriage rotated by step * ANGLE_STEP degrees"""
+    global atlas_bytes
+    sprites = atlas.get(color)
+    if sprites is None:
+        sprites = atlas[color] = [None] * ANGLE_STEPS
+    else:
+        atlas.move_to_end(color)
+
+    sprite = sprites[step]
+    if sprite is None:
         surf = pygame.Surface((CARRIAGE_WIDTH, CARRIAGE_HEIGHT),
                               pygame.SRCALPHA)
         surf.fill(color)
+        sprite = sprites[step] = pygame.transform.rotate(
+            surf, step * ANGLE_STEP)
+        atlas_bytes += sprite.get_width() * sprite.get_height() * 4
+        sprite_half_sizes[step] = (sprite.get_width() // 2,
+                                   sprite.get_height() // 2)
+
+        while atlas_bytes > ATLAS_MEMORY_LIMIT and len(atlas) > 1:
+            _, dropped = atlas.popitem(last=False)
+            atlas_bytes -= sum(old.get_width() * old.get_height() * 4
+                               for old in dropped if old is not None)
+    return sprite
+
 
-        # Rotate so the long axis lies tangent to the circle
-        rotated = pygame.transform.rotate(surf, 90 - angle_deg)
-        rect = rotated.get_rect(center=(int(x), int(y)))
-        screen.blit(rotated, rect)
+def idle():
+    """The carousel only moves while running"""
+    return not running
 
 
 def on_mouse_down(pos):
@@ -90,4 +157,4 @@ def on_mouse_down(pos):
             music.stop()
 
 
-pgzrun.go()
+game_loop.go()
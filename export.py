@@ -0,0 +1,136 @@
+"""
+Offline export of the train and carousel as a numbered PNG sequence
+The program runs headlessly to record its state for every frame of the
+clip, then a pool of worker processes draws the frames, each with its
+own copy of the program, and saves them as frame_00000.png and so on
+
+    python export.py carousel clip/ --seconds 20
+    python export.py train clip/ --seconds 60 --time-scale 100
+"""
+
+import argparse
+import multiprocessing
+import os
+import struct
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import programs
+
+FRAME_RATE = 60
+
+# zlib level for the PNG files: pygame.image.save() uses 6, which makes
+# files half the size for twice the time of encoding and drawing
+PNG_LEVEL = 1
+
+# Module values each program's draw() depends on
+STATE = {
+    "train": ("train_x", "train_speed", "state", "target_station",
+              "time_scale", "zoom"),
+    "carousel": ("rotation", "running"),
+}
+
+# Program drawn by this worker process, loaded once by init_worker()
+program_name = None
+mod = None
+out_dir = None
+
+
+def record(name, frames, time_scale=None):
+    """Run a program headlessly from its start, returning the values of
+    its STATE for each frame
+    """
+    program = programs.load(name)
+    programs.start(name, program)
+    if time_scale is not None:
+        program.time_scale = time_scale
+    states = []
+    for _ in range(frames):
+        program.update()
+        states.append(tuple(getattr(program, attr) for attr in STATE[name]))
+    return states
+
+
+def init_worker(name, path):
+    global program_name, mod, out_dir
+    programs.use_dummy_drivers()
+    program_name = name
+    mod = programs.load(name)
+    out_dir = path
+
+
+def render(frame, values):
+    """Draw one frame from its state and save it, returning the file"""
+    for attr, value in zip(STATE[program_name], values):
+        setattr(mod, attr, value)
+    mod.draw()
+    path = os.path.join(out_dir, f"frame_{frame:05}.png")
+    write_png(mod.screen.surface, path)
+    return path
+
+
+def write_png(surface, path, level=PNG_LEVEL):
+    """Save a surface as an RGB PNG file"""
+    import pygame
+
+    width, height = surface.get_size()
+    pixels = pygame.image.tobytes(surface, "RGB")
+    stride = width * 3
+    # Each row starts with its filter type, 0 for none
+    rows = b"".join(b"\0" + pixels[y:y + stride]
+                    for y in range(0, len(pixels), stride))
+
+    def chunk(kind, data):
+        return (struct.pack(">I", len(data)) + kind + data +
+                struct.pack(">I", zlib.crc32(kind + data)))
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height,
+                                           8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(rows, level)))
+        f.write(chunk(b"IEND", b""))
+
+
+def export(name, path, frames, time_scale=None, workers=None):
+    """Write the frames of a clip to path, returning the files in order"""
+    os.makedirs(path, exist_ok=True)
+    states = record(name, frames, time_scale)
+    workers = workers or os.cpu_count()
+    # A few chunks per worker keeps them all busy without much messaging
+    chunksize = max(frames // (workers * 4), 1)
+    # Fresh processes, each opening its own SDL screen, rather than forks
+    # of this one with its screen already open
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=context,
+                             initializer=init_worker,
+                             initargs=(name, path)) as pool:
+        return list(pool.map(render, range(frames), states,
+                             chunksize=chunksize))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("program", choices=STATE)
+    parser.add_argument("path", help="directory for the PNG files")
+    parser.add_argument("--seconds", type=float, default=10,
+                        help=f"length of the clip at {FRAME_RATE} fps "
+                        "(default: 10)")
+    parser.add_argument("--time-scale", type=int,
+                        help="train time compression, as set with UP")
+    parser.add_argument("--workers", type=int,
+                        help="worker processes (default: one per core)")
+    args = parser.parse_args()
+
+    programs.use_dummy_drivers()
+    frames = round(args.seconds * FRAME_RATE)
+    began = time.perf_counter()
+    export(args.program, args.path, frames, args.time_scale, args.workers)
+    elapsed = time.perf_counter() - began
+    print(f"{frames} frames written to {args.path} in {elapsed:.1f} s, "
+          f"{args.seconds / elapsed:.1f}x real time")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Pygame Zero main loop that can present part of the screen and rest
+while nothing moves
+A program that sets a module-level dirty_rects list in draw() has only
+those regions sent to the display; None sends the whole screen.
+A program with a module-level idle() function that returns True while
+its scene stays the same without input is not redrawn then, and waits
+for input instead of running at the full frame rate
+Programs run through it start the mixer only when they first load a
+sound or music, not with the rest of pygame
+"""
+
+import sys
+import threading
+
+import pygame
+import pgzero.clock
+import pgzero.music
+from pgzero import loaders
+from pgzero.game import PGZeroGame, DISPLAY_FLAGS
+
+FRAME_RATE = 60
+# Longest wait for input while idle, in milliseconds. update() still runs
+# this often, so the program can notice a change that comes without input
+IDLE_WAIT = 250
+
+# Mixer settings, as pgzero.runner sets them with pre_init()
+MIXER_SETTINGS = dict(frequency=22050, size=-16, channels=2)
+mixer_lock = threading.Lock()  # Sounds may first load on the preloader
+
+
+class Game(PGZeroGame):
+    def present(self):
+        """Send the frame just drawn to the display"""
+        rects = getattr(self.mod, "dirty_rects", None)
+        if rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
+
+    def mainloop(self):
+        """Run the main loop, as PGZeroGame does apart from present() and
+        resting while idle
+        """
+        clock = pygame.time.Clock()
+        self.reinit_screen()
+
+        update = self.get_update_func()
+        draw = self.get_draw_func()
+        idle = self.get_idle_func()
+        self.load_handlers()
+
+        pgzclock = pgzero.clock.clock
+
+        self.need_redraw = True
+        resting = False  # The idle scene is on screen
+        while True:
+            if resting:
+                events = [pygame.event.wait(self.idle_wait(pgzclock))]
+                events += pygame.event.get()
+                # The time spent resting is not run by update(), which
+                # gets one frame, but scheduled calls still keep to it
+                elapsed = clock.tick() / 1000.0
+                dt = 1 / FRAME_RATE
+            else:
+                events = pygame.event.get()
+                dt = elapsed = clock.tick(FRAME_RATE) / 1000.0
+
+            for event in events:
+                if event.type == pygame.NOEVENT:
+                    continue
+                if event.type == pygame.WINDOWEXPOSED:
+                    self.need_redraw = True
+                if event.type == pygame.QUIT:
+                    return
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_q and \
+                            event.mod & (pygame.KMOD_CTRL | pygame.KMOD_META):
+                        sys.exit(0)
+                    self.keyboard._press(event.key)
+                elif event.type == pygame.KEYUP:
+                    self.keyboard._release(event.key)
+                self.dispatch_event(event)
+
+            pgzclock.tick(elapsed)
+
+            if update:
+                update(dt)
+
+            screen_change = self.reinit_screen()
+            # An idle scene is drawn once, then again only if an event
+            # handler, scheduled call or screen change might have changed it
+            is_idle = (idle is not None and idle() and
+                       not pgzclock._each_tick)
+            if (screen_change or pgzclock.fired or self.need_redraw or
+                    (update and not (is_idle and resting))):
+                draw()
+                self.present()
+                self.need_redraw = False
+            resting = is_idle
+
+    def get_idle_func(self):
+        """Return the program's idle() function, or None"""
+        return getattr(self.mod, "idle", None)
+
+    def idle_wait(self, pgzclock):
+        """Milliseconds to wait for input, up to the next scheduled call"""
+        wait = IDLE_WAIT
+        if pgzclock.events:
+            wait = min(wait, (pgzclock.events[0].time - pgzclock.t) * 1000)
+        return max(int(wait), 1)  # 0 would wait for ever
+
+
+# The program prepare() set up to run, if any
+program = None
+
+
+def prepare(name):
+    """Set up the __main__ module as a Pygame Zero program, as importing
+    pgzrun does
+
+    Programs call this first thing with their __name__. It does nothing
+    under the pgzrun runner, or when the program is imported as a module
+    by a test or tool, so importing one opens no window and leaves pygame
+    uninitialised
+    """
+    global program
+    if name != "__main__" or getattr(sys, "_pgzrun", None):
+        return
+    program = sys.modules["__main__"]
+    prepare_mod(program)
+
+
+def prepare_mod(mod):
+    """Set up a module to run as a Pygame Zero program, as
+    pgzero.runner.prepare_mod() does
+
+    Importing pgzero.runner runs pygame.init(), which starts every
+    subsystem. Only the display and fonts are started here, and the
+    mixer the first time a sound or music file is loaded
+    """
+    from pgzero import builtins
+
+    pygame.display.init()
+    pygame.font.init()
+    for loader in (loaders.sounds, pgzero.music._loader):
+        load = loader._load
+        if getattr(load, "starts_mixer", False):
+            continue
+        loader._load = starting_mixer(load)
+    loaders.set_root(mod.__file__)
+    PGZeroGame.show_default_icon()
+    pygame.display.set_mode((100, 100), DISPLAY_FLAGS)
+    mod.__dict__.update(builtins.__dict__)
+
+
+def starting_mixer(load):
+    """Wrap a loader's _load() to start the mixer before it runs"""
+    def load_with_mixer(path):
+        with mixer_lock:
+            if not pygame.mixer.get_init():
+                pygame.mixer.init(**MIXER_SETTINGS)
+        return load(path)
+    load_with_mixer.starts_mixer = True
+    return load_with_mixer
+
+
+def running():
+    """Whether the program is set up to run, by prepare(), the pgzrun
+    runner or programs.load(), rather than just imported
+
+    Programs only load assets, which need the window and the loaders'
+    root, when this is True
+    """
+    return program is not None or bool(getattr(sys, "_pgzrun", None))
+
+
+def go():
+    """Run the program prepare() set up like pgzrun.go(), using this loop
+
+    This does nothing if prepare() did nothing. Under the pgzrun runner
+    Pygame Zero's own loop runs, which always presents the whole screen
+    """
+    if program is not None:
+        Game(program).run()
@@ -0,0 +1,106 @@
+"""
+Quick-starting launcher for the Pygame Zero programs
+Runs a program as python "file.py" would, importing pygame without the
+module it loads only to find its data files
+
+    python launch.py carousel
+    python launch.py --startup         cold start to first frame, all programs
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import programs
+
+# Imported by pygame at startup only to find its own data files, which it
+# also finds without it, and the largest part of pygame's import time
+SKIPPED_IMPORTS = ("pkg_resources",)
+
+STARTUP_RUNS = 5
+
+
+def import_pygame():
+    """Import pygame, with SKIPPED_IMPORTS hidden from it"""
+    if "pygame" in sys.modules:
+        return
+    hidden = [name for name in SKIPPED_IMPORTS if name not in sys.modules]
+    for name in hidden:
+        sys.modules[name] = None  # Makes importing it fail straight away
+    try:
+        import pygame  # noqa: F401
+    finally:
+        for name in hidden:
+            if sys.modules.get(name, False) is None:
+                del sys.modules[name]
+
+
+def run(name, fast=True, first_frame=False):
+    """Run a program in its window
+
+    With first_frame, print the wall-clock time the first frame is
+    presented and exit
+    """
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    if fast:
+        import_pygame()
+    import game_loop
+
+    mod = programs.load(name)
+    game = game_loop.Game(mod)
+    if first_frame:
+        def present():
+            game_loop.Game.present(game)
+            print(time.time(), flush=True)
+            sys.exit(0)
+        game.present = present
+    game.run()
+
+
+def startup(name, fast):
+    """Median seconds from starting a new process to its first frame"""
+    command = [sys.executable, os.path.abspath(__file__), name,
+               "--first-frame"]
+    if not fast:
+        command.append("--plain")
+    times = []
+    for _ in range(STARTUP_RUNS):
+        start = time.time()
+        output = subprocess.run(command, capture_output=True, text=True,
+                                check=True).stdout
+        times.append(float(output.split()[-1]) - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("program", nargs="?", choices=programs.PROGRAMS)
+    parser.add_argument("--plain", action="store_true",
+                        help="import pygame in full, as the programs do")
+    parser.add_argument("--first-frame", action="store_true",
+                        help=argparse.SUPPRESS)
+    parser.add_argument("--startup", action="store_true",
+                        help="measure cold start to first frame, headless")
+    args = parser.parse_args()
+
+    if args.startup:
+        programs.use_dummy_drivers()
+        names = [args.program] if args.program else programs.PROGRAMS
+        print(f"{'program':10} {'plain':>7} {'fast':>7}")
+        for name in names:
+            plain = startup(name, fast=False) * 1000
+            fast = startup(name, fast=True) * 1000
+            print(f"{name:10} {plain:7.0f} {fast:7.0f}")
+        print(f"median ms of {STARTUP_RUNS} runs from process start to "
+              "first frame")
+    elif args.program:
+        run(args.program, not args.plain, args.first_frame)
+    else:
+        parser.error("a program is needed unless measuring --startup")
+
+
+if __name__ == "__main__":
+    main()
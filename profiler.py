@@ -0,0 +1,186 @@
+"""
+Frame profiler for the Pygame Zero programs
+Runs a program in its window with every phase of each frame timed, a
+rolling frame-time graph drawn over the game, and a per-frame CSV log
+written on exit
+
+    python profiler.py train --log train_frames.csv
+"""
+
+import argparse
+import csv
+import time
+from array import array
+
+import programs
+
+clock = time.perf_counter_ns
+
+# Phases of a frame, in the order they happen. Sound time is also part of
+# the update or event handler that played the sound.
+PHASES = ("events", "update", "sound", "draw", "overlay", "present")
+
+# Rolling graph: one bar per frame, GRAPH_SCALE_MS at full height
+GRAPH_FRAMES = 120
+GRAPH_HEIGHT = 60
+GRAPH_SCALE_MS = 50
+FRAME_BUDGET_MS = 1000 / 60
+
+
+class Profile:
+    """Nanoseconds spent in each phase, one column entry per frame"""
+
+    def __init__(self):
+        self.columns = {phase: array("q") for phase in PHASES + ("frame",)}
+        self.current = dict.fromkeys(PHASES, 0)
+        self.frame_start = clock()
+
+    def add(self, phase, ns):
+        self.current[phase] += ns
+
+    def end_frame(self):
+        now = clock()
+        for phase in PHASES:
+            self.columns[phase].append(self.current[phase])
+            self.current[phase] = 0
+        self.columns["frame"].append(now - self.frame_start)
+        self.frame_start = now
+
+    def write_csv(self, path):
+        """Write one row per frame, in microseconds"""
+        names = ("frame",) + PHASES
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["index"] + [f"{name}_us" for name in names])
+            rows = zip(*(self.columns[name] for name in names))
+            for index, row in enumerate(rows):
+                writer.writerow([index] + [ns // 1000 for ns in row])
+
+
+class TimedAudio:
+    """Stand-in for sounds or music that times every call as sound
+
+    Looking up a sound is timed too, since Pygame Zero loads it then
+    """
+
+    def __init__(self, target, profile):
+        self._target = target
+        self._profile = profile
+
+    def __getattr__(self, name):
+        start = clock()
+        value = getattr(self._target, name)
+        self._profile.add("sound", clock() - start)
+        if not callable(value):
+            return TimedAudio(value, self._profile)
+
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return value(*args, **kwargs)
+            finally:
+                self._profile.add("sound", clock() - start)
+        return timed
+
+
+def make_game(mod, profile):
+    """Return the program's game loop with every phase timed"""
+    import pygame
+    import game_loop
+    from text_cache import draw_text
+
+    class ProfiledGame(game_loop.Game):
+        def get_update_func(self):
+            update = super().get_update_func()
+            if update is None:
+                return None
+
+            def timed_update(dt):
+                start = clock()
+                update(dt)
+                profile.add("update", clock() - start)
+            return timed_update
+
+        def get_draw_func(self):
+            draw = super().get_draw_func()
+
+            def timed_draw():
+                start = clock()
+                draw()
+                middle = clock()
+                draw_overlay()
+                profile.add("draw", middle - start)
+                profile.add("overlay", clock() - middle)
+            return timed_draw
+
+        def get_idle_func(self):
+            # Draw every frame, so each one is timed the same way
+            return None
+
+        def dispatch_event(self, event):
+            start = clock()
+            super().dispatch_event(event)
+            profile.add("events", clock() - start)
+
+        def present(self):
+            start = clock()
+            # The graph covers part of any frame, so present all of it
+            pygame.display.flip()
+            profile.add("present", clock() - start)
+            profile.end_frame()
+
+    panel = pygame.Surface((GRAPH_FRAMES * 2, GRAPH_HEIGHT + 20),
+                           pygame.SRCALPHA)
+    panel.fill((0, 0, 0, 160))
+
+    def draw_overlay():
+        frames = profile.columns["frame"][-GRAPH_FRAMES:]
+        surface = mod.screen.surface
+        left = surface.get_width() - GRAPH_FRAMES * 2 - 10
+        top = 10
+        surface.blit(panel, (left, top))
+
+        bottom = top + GRAPH_HEIGHT
+        for i, ns in enumerate(frames):
+            ms = ns / 1e6
+            height = min(int(ms / GRAPH_SCALE_MS * GRAPH_HEIGHT), GRAPH_HEIGHT)
+            color = (0, 220, 0) if ms <= FRAME_BUDGET_MS else (240, 60, 60)
+            pygame.draw.line(surface, color, (left + i * 2, bottom),
+                             (left + i * 2, bottom - height), 2)
+
+        budget = bottom - int(FRAME_BUDGET_MS / GRAPH_SCALE_MS * GRAPH_HEIGHT)
+        pygame.draw.line(surface, (255, 255, 255), (left, budget),
+                         (left + GRAPH_FRAMES * 2 - 1, budget))
+        if frames:
+            worst = max(frames) / 1e6
+            draw_text(mod.screen, f"worst {worst:.1f} ms", 16, "white",
+                      topleft=(left + 4, bottom + 3))
+
+    return ProfiledGame(mod)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("program", choices=programs.PROGRAMS)
+    parser.add_argument("--log", default="frames.csv",
+                        help="CSV file written on exit (default: %(default)s)")
+    args = parser.parse_args()
+
+    mod = programs.load(args.program)
+    profile = Profile()
+    for name in ("sounds", "music"):
+        if hasattr(mod, name):
+            setattr(mod, name, TimedAudio(getattr(mod, name), profile))
+
+    try:
+        make_game(mod, profile).run()
+    finally:
+        profile.write_csv(args.log)
+        print(f"{len(profile.columns['frame'])} frames written to {args.log}")
+        if getattr(mod, "preloader", None) is not None:
+            for line in mod.preloader.report():
+                print(f"preloaded {line}")
+
+
+if __name__ == "__main__":
+    main()
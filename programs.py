@@ -0,0 +1,71 @@
+"""
+Loading the Pygame Zero programs as modules, without entering their loop
+Used by the benchmark and other tools that drive update() and draw()
+themselves
+"""
+
+import os
+import sys
+from types import ModuleType
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Short names for the programs in this folder
+PROGRAMS = {
+    "train": "train simulator.py",
+    "carousel": "carousel.py",
+    "simon": "simon.py",
+    "simon2": "simon 2.py",
+    "test1": "test1.py",
+}
+
+
+def use_dummy_drivers():
+    """Render and play sound without a window or audio device
+
+    Must be called before pygame is first imported
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+
+def start(name, mod):
+    """Get a program moving, as the first click or key press would"""
+    import pygame
+
+    match name:
+        case "train":
+            mod.on_mouse_down(mod.button.center)
+        case "carousel":
+            mod.on_mouse_down(mod.BUTTON_RECT.center)
+        case "simon" | "simon2":
+            mod.on_key_down(pygame.K_SPACE)
+        case "test1":
+            mod.keyboard._press(pygame.K_RIGHT)
+
+
+def load(name):
+    """Run a program's module code and open its screen, then return it
+
+    The program is set up as the pgzrun runner would, so its own
+    game_loop.go() call returns straight away instead of running the game
+    """
+    from pgzero.game import PGZeroGame
+    from game_loop import prepare_mod
+
+    path = os.path.join(HERE, PROGRAMS[name])
+    with open(path) as f:
+        src = f.read()
+    code = compile(src, os.path.basename(path), "exec", dont_inherit=True)
+
+    mod = ModuleType(name)
+    mod.__file__ = path
+    sys.modules[name] = mod
+
+    # Indicate that we're running with the pgzrun runner
+    sys._pgzrun = True
+
+    prepare_mod(mod)
+    exec(code, mod.__dict__)
+    PGZeroGame(mod).reinit_screen()
+    return mod
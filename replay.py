@@ -0,0 +1,229 @@
+"""
+Input recording and headless replay for the Pygame Zero programs
+A session is played in the window with every key and mouse button event
+logged by frame, along with the random seed and regular checkpoints of
+the program's state. Replaying feeds the same events to update() as fast
+as it will run, with no window, and checks every checkpoint
+
+    python replay.py record simon session.pgzr
+    python replay.py play session.pgzr
+"""
+
+import argparse
+import random
+import struct
+import sys
+import zlib
+from functools import reduce
+
+import programs
+
+MAGIC = b"PGZR"
+VERSION = 1
+
+# update() is given a fixed time step, so a replay runs it exactly as
+# the recorded session did whatever the frame rate
+DT = 1 / 60
+CHECKPOINT_FRAMES = 60
+
+# Records: kind and frame, then a payload that depends on the kind
+HEADER = struct.Struct("<4sBQB")  # magic, version, seed, name length
+RECORD = struct.Struct("<BI")
+KEY_DOWN, KEY_UP, MOUSE_DOWN, MOUSE_UP, CHECKPOINT, END = range(1, 7)
+PAYLOADS = {
+    KEY_DOWN: struct.Struct("<iH"),  # key, modifiers
+    KEY_UP: struct.Struct("<iH"),
+    MOUSE_DOWN: struct.Struct("<hhB"),  # x, y, button
+    MOUSE_UP: struct.Struct("<hhB"),
+    CHECKPOINT: struct.Struct("<I"),  # CRC-32 of the program's state
+    END: struct.Struct("<"),
+}
+
+# Module values that make up each program's state at a checkpoint
+STATE = {
+    "train": ("train_x", "train_speed", "state", "target_station",
+              "dwell_left", "time_scale"),
+    "carousel": ("rotation", "running"),
+    "simon": ("game.frame", "game.state", "game.current_flash",
+              "game.current_step", "game.score", "game.player_step",
+              "game.sequence.seed"),
+    "simon2": ("game_state", "flash_timer", "current_flash", "current_step",
+               "score", "player_step", "sequence.seed"),
+    "test1": ("actor.pos",),
+}
+
+
+def state_crc(name, mod):
+    """CRC-32 of the state values of a program"""
+    values = tuple(reduce(getattr, path.split("."), mod)
+                   for path in STATE[name])
+    return zlib.crc32(repr(values).encode())
+
+
+class Log:
+    """A recorded session: program, seed and (kind, frame, values)"""
+
+    def __init__(self, name, seed, records=None):
+        self.name = name
+        self.seed = seed
+        self.records = records if records is not None else []
+
+    def add(self, kind, frame, *values):
+        self.records.append((kind, frame, values))
+
+    def write(self, path):
+        name = self.name.encode()
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.seed, len(name)))
+            f.write(name)
+            for kind, frame, values in self.records:
+                f.write(RECORD.pack(kind, frame))
+                f.write(PAYLOADS[kind].pack(*values))
+
+    @classmethod
+    def read(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, seed, size = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} session log")
+        offset = HEADER.size
+        name = data[offset:offset + size].decode()
+        offset += size
+
+        records = []
+        while offset < len(data):
+            kind, frame = RECORD.unpack_from(data, offset)
+            offset += RECORD.size
+            payload = PAYLOADS[kind]
+            records.append((kind, frame, payload.unpack_from(data, offset)))
+            offset += payload.size
+        return cls(name, seed, records)
+
+
+def load(name, seed):
+    """Load a program with the random module seeded first"""
+    random.seed(seed)
+    return programs.load(name)
+
+
+def record(name, path, seed=None):
+    """Play a program in its window, logging the session to path"""
+    import pygame
+    import game_loop
+
+    if seed is None:
+        seed = random.getrandbits(64)
+    log = Log(name, seed)
+    mod = load(name, seed)
+    frame = 0
+
+    kinds = {
+        pygame.KEYDOWN: KEY_DOWN,
+        pygame.KEYUP: KEY_UP,
+        pygame.MOUSEBUTTONDOWN: MOUSE_DOWN,
+        pygame.MOUSEBUTTONUP: MOUSE_UP,
+    }
+
+    class RecordingGame(game_loop.Game):
+        def get_update_func(self):
+            update = super().get_update_func() or (lambda dt: None)
+
+            def fixed_update(dt):
+                nonlocal frame
+                update(DT)
+                frame += 1
+                if frame % CHECKPOINT_FRAMES == 0:
+                    log.add(CHECKPOINT, frame, state_crc(name, mod))
+            return fixed_update
+
+        def get_idle_func(self):
+            # Run every frame, as the replay does, rather than resting
+            return None
+
+        def dispatch_event(self, event):
+            kind = kinds.get(event.type)
+            if kind in (KEY_DOWN, KEY_UP):
+                log.add(kind, frame, event.key, event.mod)
+            elif kind is not None:
+                log.add(kind, frame, *event.pos, event.button)
+            super().dispatch_event(event)
+
+    try:
+        RecordingGame(mod).run()
+    finally:
+        log.add(CHECKPOINT, frame, state_crc(name, mod))
+        log.add(END, frame)
+        log.write(path)
+        print(f"{frame} frames, {len(log.records)} records written to {path}")
+
+
+def play(log):
+    """Replay a session headlessly, returning the first frame whose
+    checkpoint does not match, or None if all of them do
+    """
+    import pygame
+    import game_loop
+
+    mod = load(log.name, log.seed)
+    game = game_loop.Game(mod)
+    game.load_handlers()
+    update = game.get_update_func() or (lambda dt: None)
+    frame = 0
+
+    for kind, at, values in log.records:
+        while frame < at:
+            update(DT)
+            frame += 1
+
+        if kind in (KEY_DOWN, KEY_UP):
+            key, mod_keys = values
+            if kind == KEY_DOWN:
+                game.keyboard._press(key)
+                event = pygame.event.Event(pygame.KEYDOWN, key=key,
+                                           mod=mod_keys, unicode="")
+            else:
+                game.keyboard._release(key)
+                event = pygame.event.Event(pygame.KEYUP, key=key,
+                                           mod=mod_keys)
+            game.dispatch_event(event)
+        elif kind in (MOUSE_DOWN, MOUSE_UP):
+            x, y, button = values
+            event_type = (pygame.MOUSEBUTTONDOWN if kind == MOUSE_DOWN
+                          else pygame.MOUSEBUTTONUP)
+            game.dispatch_event(pygame.event.Event(
+                event_type, pos=(x, y), button=button))
+        elif kind == CHECKPOINT:
+            if values[0] != state_crc(log.name, mod):
+                return frame
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+    recorder = commands.add_parser("record", help="play and record")
+    recorder.add_argument("program", choices=programs.PROGRAMS)
+    recorder.add_argument("log")
+    recorder.add_argument("--seed", type=int,
+                          help="random seed (default: a random one)")
+    player = commands.add_parser("play", help="replay and check")
+    player.add_argument("log")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.program, args.log, args.seed)
+        return
+
+    programs.use_dummy_drivers()
+    log = Log.read(args.log)
+    frame = play(log)
+    if frame is not None:
+        print(f"{log.name}: state differs from the recording at frame {frame}")
+        sys.exit(1)
+    print(f"{log.name}: {log.records[-1][1]} frames replayed, "
+          "all checkpoints match")
+
+
+if __name__ == "__main__":
+    main()
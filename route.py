@@ -0,0 +1,66 @@
+"""
+Multi-stop routes for the Silver Meteor train, loaded from CSV files
+Stops are kept in sorted lists so the stop ahead of a train is found by
+bisection, however many stops a route has
+"""
+
+import csv
+import os
+from bisect import bisect_left, bisect_right
+
+from train_physics import Destination, STATION_NYC_X, MILES_PER_PIXEL
+
+FRAME_RATE = 60
+DEFAULT_DWELL = 1.0  # seconds at an intermediate stop
+
+SILVER_METEOR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "routes", "silver_meteor.csv")
+
+
+class Route:
+    """Stops in order from New York City (first) to Miami (last)"""
+
+    def __init__(self, stops):
+        # stops is a list of (name, miles from New York, dwell seconds)
+        stops = sorted(stops, key=lambda stop: stop[1])
+        if len(stops) < 2:
+            raise ValueError("A route needs at least two stops")
+        self.names = [name for name, _, _ in stops]
+        self.x = [STATION_NYC_X + miles / MILES_PER_PIXEL
+                  for _, miles, _ in stops]
+        self.dwell_frames = [round(dwell * FRAME_RATE)
+                             for _, _, dwell in stops]
+
+    @classmethod
+    def load(cls, path):
+        """Read a route from a CSV file with name, miles and dwell columns
+
+        Lines starting with # are comments; a blank dwell means
+        DEFAULT_DWELL seconds
+        """
+        with open(path, newline="") as f:
+            rows = csv.DictReader(line for line in f
+                                  if not line.startswith("#"))
+            stops = [(row["name"], float(row["miles"]),
+                      float(row["dwell"] or DEFAULT_DWELL))
+                     for row in rows]
+        return cls(stops)
+
+    def __len__(self):
+        return len(self.x)
+
+    def ahead(self, x, target):
+        """Index of the next stop a train at x heading for target reaches"""
+        if target == Destination.MIAMI:
+            return min(bisect_right(self.x, x), len(self.x) - 1)
+        return max(bisect_left(self.x, x) - 1, 0)
+
+    def is_terminus(self, i):
+        return i == 0 or i == len(self.x) - 1
+
+    def stop_at(self, x):
+        """Index of the stop exactly at x, or None"""
+        i = bisect_left(self.x, x)
+        if i < len(self.x) and self.x[i] == x:
+            return i
+        return None
@@ -1,10 +1,13 @@
-import pgzrun
+import game_loop
+game_loop.prepare(__name__)  # Set up as a Pygame Zero program if run
 from pgzero.screen import Screen
 from pygame import Rect
 from pygame.locals import K_SPACE
-import random
 from enum import Enum
 
+from simon_sequence import PackedSequence
+from text_cache import draw_text
+
 # Screen dimensions
 WIDTH = 800
 HEIGHT = 600
@@ -33,8 +36,8 @@ class GameState(Enum):
 
 # Game state variables
 game_state = GameState.WAITING
-sequence = []
-player_sequence = []
+sequence = PackedSequence()
+player_step = 0  # Buttons of the sequence repeated so far
 current_step = 0
 score = 0
 flash_timer = 0
@@ -59,16 +62,15 @@ for button_id, (x, y, w, h, _, _) in buttons.items():
 
 def add_to_sequence():
     """Add a random button to the sequence"""
-    global sequence
-    sequence.append(random.randint(0, 3))
+    sequence.add_random()
 
 
 def start_game():
     """Start a new game"""
-    global game_state, sequence, player_sequence, current_step, score, message
+    global game_state, sequence, player_step, current_step, score, message
     game_state = GameState.SHOWING
-    sequence = []
-    player_sequence = []
+    sequence = PackedSequence()
+    player_step = 0
     current_step = 0
     score = 0
     add_to_sequence()
@@ -87,7 +89,7 @@ def start_showing_sequence():
 
 def update_showing():
     """Update the sequence showing state"""
-    global flash_timer, current_flash, current_step, game_state, player_sequence, message
+    global flash_timer, current_flash, current_step, game_state, player_step, message
 
     flash_timer += 1
 
@@ -100,7 +102,7 @@ def update_showing():
             else:
                 # Done showing sequence, start listening
                 game_state = GameState.LISTENING
-                player_sequence = []
+                player_step = 0
                 message = "Your turn!"
     else:
         # Currently flashing a button
@@ -112,22 +114,21 @@ def update_showing():
 
 def handle_player_input(button_id_):
     """Handle player button press"""
-    global player_sequence, game_state, message, score
+    global player_step, game_state, message, score
 
     if game_state != GameState.LISTENING:
         return
 
-    player_sequence.append(button_id_)
-
     # Check if the input matches the sequence so far
-    if player_sequence[-1] != sequence[len(player_sequence) - 1]:
+    if button_id_ != sequence[player_step]:
         # Wrong button pressed
         game_state = GameState.GAME_OVER
         message = f"Game Over! Final Score: {score}"
         return
+    player_step += 1
 
     # Check if player completed the current sequence
-    if len(player_sequence) == len(sequence):
+    if player_step == len(sequence):
         # Player got it right!
         score += 1
         add_to_sequence()
@@ -156,12 +157,17 @@ def draw():
     screen.draw.circle((WIDTH // 2, HEIGHT // 2), 80, WHITE)
 
     # Draw text
-    screen.draw.text(message, centerx=WIDTH // 2, centery=HEIGHT // 2,
-                     fontsize=24, color=WHITE)
+    draw_text(screen, message, 24, WHITE,
+              centerx=WIDTH // 2, centery=HEIGHT // 2)
 
     if game_state == GameState.GAME_OVER:
-        screen.draw.text("Press SPACE to play again", centerx=WIDTH // 2,
-                         centery=HEIGHT // 2 + 40, fontsize=20, color=WHITE)
+        draw_text(screen, "Press SPACE to play again", 20, WHITE,
+                  centerx=WIDTH // 2, centery=HEIGHT // 2 + 40)
+
+
+def idle():
+    """Nothing changes but in answer to a key or click"""
+    return game_state != GameState.SHOWING
 
 
 def on_key_down(key):
@@ -184,4 +190,4 @@ def on_mouse_down(pos):
 
 
 # Run the game
-pgzrun.go()
\ No newline at end of file
+game_loop.go()
\ No newline at end of file
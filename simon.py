@@ -1,8 +1,11 @@
-import pgzrun
+import game_loop
+game_loop.prepare(__name__)  # Set up as a Pygame Zero program if run
 import pygame
+from pgzero.clock import clock
 from pgzero.screen import Screen
-import random
-from enum import Enum
+
+from simon_rules import GameState, SimonRules
+from text_cache import draw_text
 
 screen: Screen
 
@@ -24,25 +27,11 @@ DARK_YELLOW = (128, 128, 0)
 GRAY = (128, 128, 128)
 
 
-class GameState(Enum):
-    WAITING = 1
-    SHOWING = 2
-    LISTENING = 3
-    GAME_OVER = 4
-
+class SimonGame(SimonRules):
+    """A game of Simon with the buttons to show it on screen"""
 
-class SimonGame:
     def __init__(self):
-        self.state = GameState.WAITING
-        self.sequence = []
-        self.player_sequence = []
-        self.current_step = 0
-        self.score = 0
-        self.flash_timer = 0
-        self.flash_duration = 60  # frames
-        self.pause_duration = 20  # frames between flashes
-        self.current_flash = -1
-        self.message = "Press SPACE to start!"
+        super().__init__()
 
         # Button definitions (x, y, width, height, normal_color, flash_color)
         self.buttons = {
@@ -57,77 +46,6 @@ class SimonGame:
         for button_id, (x, y, w, h, _, _) in self.buttons.items():
             self.button_rects[button_id] = pygame.Rect(x, y, w, h)
 
-    def add_to_sequence(self):
-        """Add a random button to the sequence"""
-        self.sequence.append(random.randint(0, 3))
-
-    def start_game(self):
-        """Start a new game"""
-        self.state = GameState.SHOWING
-        self.sequence = []
-        self.player_sequence = []
-        self.current_step = 0
-        self.score = 0
-        self.add_to_sequence()
-        self.start_showing_sequence()
-        self.message = f"Round {len(self.sequence)}"
-
-    def start_showing_sequence(self):
-        """Start showing the sequence to the player"""
-        self.state = GameState.SHOWING
-        self.current_step = 0
-        self.flash_timer = 0
-        self.current_flash = -1
-
-    def update_showing(self):
-        """Update the sequence showing state"""
-        self.flash_timer += 1
-
-        if self.current_flash == -1:
-            # Pause before showing next button
-            if self.flash_timer >= self.pause_duration:
-                if self.current_step < len(self.sequence):
-                    self.current_flash = self.sequence[self.current_step]
-                    self.flash_timer = 0
-                else:
-                    # Done showing sequence, start listening
-                    self.state = GameState.LISTENING
-                    self.player_sequence = []
-                    self.message = "Your turn!"
-        else:
-            # Currently flashing a button
-            if self.flash_timer >= self.flash_duration:
-                self.current_flash = -1
-                self.flash_timer = 0
-                self.current_step += 1
-
-    def handle_player_input(self, button_id):
-        """Handle player button press"""
-        if self.state != GameState.LISTENING:
-            return
-
-        self.player_sequence.append(button_id)
-
-        # Check if the input matches the sequence so far
-        if self.player_sequence[-1] != self.sequence[len(self.player_sequence) - 1]:
-            # Wrong button pressed
-            self.state = GameState.GAME_OVER
-            self.message = f"Game Over! Final Score: {self.score}"
-            return
-
-        # Check if player completed the current sequence
-        if len(self.player_sequence) == len(self.sequence):
-            # Player got it right!
-            self.score += 1
-            self.add_to_sequence()
-            self.start_showing_sequence()
-            self.message = f"Round {len(self.sequence)} - Score: {self.score}"
-
-    def update(self):
-        """Update game state"""
-        if self.state == GameState.SHOWING:
-            self.update_showing()
-
     def draw(self, scr):
         """Draw the game"""
         scr.fill(BLACK)
@@ -143,16 +61,17 @@ class SimonGame:
         pygame.draw.circle(scr.surface, WHITE, (WIDTH // 2, HEIGHT // 2), 80, 3)
 
         # Draw text
-        scr.draw.text(self.message, centerx=WIDTH // 2, centery=HEIGHT // 2,
-                      fontsize=24, color=WHITE)
+        draw_text(scr, self.message, 24, WHITE,
+                  centerx=WIDTH // 2, centery=HEIGHT // 2)
 
         if self.state == GameState.GAME_OVER:
-            scr.draw.text("Press SPACE to play again", centerx=WIDTH // 2,
-                          centery=HEIGHT // 2 + 40, fontsize=20, color=WHITE)
+            draw_text(scr, "Press SPACE to play again", 20, WHITE,
+                      centerx=WIDTH // 2, centery=HEIGHT // 2 + 40)
 
 
 # Create game instance
 game = SimonGame()
+wake_at = None  # Frame of the sequence change wake() is scheduled for
 
 
 def update():
@@ -165,6 +84,26 @@ def draw():
     game.draw(screen)
 
 
+def idle():
+    """Nothing changes but in answer to a key or click, or at the next
+    change of the sequence being shown, which wake() is scheduled for
+    """
+    global wake_at
+    if game.state == GameState.SHOWING and game.next_change != wake_at:
+        wake_at = game.next_change
+        frames = game.next_change - game.frame
+        clock.schedule_unique(wake, frames / game_loop.FRAME_RATE)
+    return True
+
+
+def wake():
+    """Catch the show up after resting, up to the frame before its next
+    change, so the update() that follows makes the change
+    """
+    if game.state == GameState.SHOWING and game.next_change == wake_at:
+        game.fast_forward(max(wake_at - 1 - game.frame, 0))
+
+
 def on_key_down(key):
     """Handle key presses"""
     if key == pygame.K_SPACE:
@@ -184,4 +123,4 @@ def on_mouse_down(pos):
             break
 
 # Run the game
-pgzrun.go()
\ No newline at end of file
+game_loop.go()
\ No newline at end of file
@@ -0,0 +1,148 @@
+"""
+Rules of Simon, with no window
+SimonRules plays one game, counting time in frames; simon.py draws it in
+a window and simon_server.py plays it with remote clients. The frame the
+game next changes on is always known, so a game can be moved straight to
+it instead of being updated every frame
+"""
+
+from enum import Enum
+
+from simon_sequence import PackedSequence
+
+FLASH_FRAMES = 60  # A button is lit
+PAUSE_FRAMES = 20  # Between flashes, and before the first
+
+
+class GameState(Enum):
+    WAITING = 1
+    SHOWING = 2
+    LISTENING = 3
+    GAME_OVER = 4
+
+
+class SimonRules:
+    """One game of Simon, with no window
+
+    max_rounds ends the game as a win once that many rounds are done;
+    None plays on until a wrong press
+    """
+
+    __slots__ = ("state", "sequence", "player_step", "current_step",
+                 "score", "flash_duration", "pause_duration",
+                 "current_flash", "message", "max_rounds", "frame",
+                 "show_start", "next_change")
+
+    def __init__(self, max_rounds=None):
+        self.state = GameState.WAITING
+        self.sequence = PackedSequence()
+        self.player_step = 0  # Buttons of the sequence repeated so far
+        self.current_step = 0
+        self.score = 0
+        self.flash_duration = FLASH_FRAMES
+        self.pause_duration = PAUSE_FRAMES
+        self.current_flash = -1
+        self.message = "Press SPACE to start!"
+        self.max_rounds = max_rounds
+
+        # Frames since the game was created, and the frame on which the
+        # sequence being shown started and will next change
+        self.frame = 0
+        self.show_start = 0
+        self.next_change = 0
+
+    def add_to_sequence(self):
+        """Add a random button to the sequence"""
+        self.sequence.add_random()
+
+    def start_game(self):
+        """Start a new game"""
+        self.state = GameState.SHOWING
+        self.sequence = PackedSequence()
+        self.player_step = 0
+        self.current_step = 0
+        self.score = 0
+        self.add_to_sequence()
+        self.start_showing_sequence()
+        self.message = f"Round {len(self.sequence)}"
+
+    def start_showing_sequence(self):
+        """Start showing the sequence to the player"""
+        self.state = GameState.SHOWING
+        self.show_start = self.frame
+        self.update_showing()
+
+    def update_showing(self):
+        """Bring the sequence showing state up to the current frame
+
+        Each step of the sequence is a pause followed by a flash, so
+        where the show is can be worked out from the frames since it
+        started, however many frames have passed
+        """
+        period = self.pause_duration + self.flash_duration
+        step, into_step = divmod(self.frame - self.show_start, period)
+
+        if step >= len(self.sequence) and (step > len(self.sequence) or
+                                           into_step >= self.pause_duration):
+            # Done showing sequence, start listening
+            self.state = GameState.LISTENING
+            self.current_flash = -1
+            self.player_step = 0
+            self.message = "Your turn!"
+            return
+
+        self.current_step = step
+        if into_step < self.pause_duration:
+            # Pause before showing next button
+            self.current_flash = -1
+            self.next_change = (self.show_start + step * period +
+                                self.pause_duration)
+        else:
+            # Currently flashing a button
+            self.current_flash = self.sequence[step]
+            self.next_change = self.show_start + (step + 1) * period
+
+    def fast_forward(self, frames):
+        """Move the game on by a number of frames in one go"""
+        self.frame += frames
+        if self.state == GameState.SHOWING:
+            self.update_showing()
+
+    def seek_show(self, frame):
+        """Jump to a frame of the sequence being shown, from its start"""
+        if self.state == GameState.SHOWING:
+            self.frame = self.show_start + frame
+            self.update_showing()
+
+    def handle_player_input(self, button_id):
+        """Handle player button press"""
+        if self.state != GameState.LISTENING:
+            return
+
+        # Check if the input matches the sequence so far
+        if button_id != self.sequence[self.player_step]:
+            # Wrong button pressed
+            self.state = GameState.GAME_OVER
+            self.message = f"Game Over! Final Score: {self.score}"
+            return
+        self.player_step += 1
+
+        # Check if player completed the current sequence
+        if self.player_step == len(self.sequence):
+            # Player got it right!
+            self.score += 1
+            if len(self.sequence) == self.max_rounds:
+                self.state = GameState.GAME_OVER
+                self.message = f"You win! Final Score: {self.score}"
+                return
+            self.add_to_sequence()
+            self.start_showing_sequence()
+            self.message = (f"Round {len(self.sequence)} - "
+                            f"Score: {self.score}")
+
+    def update(self):
+        """Update game state"""
+        self.frame += 1
+        # Nothing changes between the scheduled frames
+        if self.state == GameState.SHOWING and self.frame >= self.next_change:
+            self.update_showing()
@@ -0,0 +1,50 @@
+"""
+Button sequence for the Simon games, stored 2 bits per step
+New steps come from a counter-based generator, so step i of a game
+depends only on the game's seed and i; a million-step game takes a
+quarter of a megabyte and can be rebuilt from its seed alone
+"""
+
+import random
+
+MASK = (1 << 64) - 1
+
+
+def button_for(seed, i):
+    """Button 0-3 for step i of the game with this seed (SplitMix64)"""
+    z = (seed + (i + 1) * 0x9E3779B97F4A7C15) & MASK
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK
+    return (z ^ (z >> 31)) >> 62
+
+
+class PackedSequence:
+    """Buttons 0-3 packed four to a byte"""
+
+    __slots__ = ("seed", "_packed", "_length")
+
+    def __init__(self, seed=None):
+        self.seed = random.getrandbits(64) if seed is None else seed
+        self._packed = bytearray()
+        self._length = 0
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._length
+        if not 0 <= i < self._length:
+            raise IndexError("sequence index out of range")
+        return (self._packed[i >> 2] >> ((i & 3) * 2)) & 3
+
+    def append(self, button):
+        i = self._length
+        if i & 3 == 0:
+            self._packed.append(0)
+        self._packed[i >> 2] |= button << ((i & 3) * 2)
+        self._length += 1
+
+    def add_random(self):
+        """Add the next step generated from the seed"""
+        self.append(button_for(self.seed, self._length))
@@ -0,0 +1,226 @@
+"""
+Headless Simon server, one game for every client connected over TCP
+Games are played by the same rules and timing as simon.py's, but nothing
+is run per frame: a game showing its sequence is filed in a timer wheel
+under the frame it next changes on, and one task turns the wheel for
+them all
+
+    python simon_server.py --port 8765
+    nc localhost 8765
+
+Each line a client sends is a command:
+    START          start a game, once connected or after GAME OVER
+    PRESS 0-3      press a button while it is your turn
+    QUIT           leave
+and each line from the server is an event:
+    READY          connected, send START to play
+    ROUND n        a sequence of n buttons is about to be shown
+    FLASH b, OFF   button b lights up, and goes dark again
+    GO             repeat the sequence with PRESS
+    OK             that press was right, go on
+    GAME OVER s    a wrong press; s rounds were completed
+    WIN s          every one of MAX_ROUNDS rounds completed
+    ERROR text     a command that could not be carried out
+"""
+
+import argparse
+import asyncio
+
+from simon_rules import GameState, SimonRules, FLASH_FRAMES, PAUSE_FRAMES
+
+# Ticks of the timer wheel are the games' frames
+TICK = 1 / 60
+# More than the longest delay scheduled, in ticks
+WHEEL_SLOTS = 2 * max(FLASH_FRAMES, PAUSE_FRAMES)
+
+# Limits on what one session can take up
+MAX_ROUNDS = 1000  # Sequence steps, packed four to a byte
+MAX_LINE = 64  # Bytes in a command
+MAX_BUFFERED = 16 * 1024  # Bytes not yet sent before a client is dropped
+
+# Connections waiting to be accepted; asyncio's default of 100 loses
+# some when a crowd of clients connects at once
+BACKLOG = 4096
+
+
+class Session:
+    """One client's game"""
+
+    __slots__ = ("writer", "game", "due")
+
+    def __init__(self, writer, max_rounds):
+        self.writer = writer
+        self.game = SimonRules(max_rounds)
+        self.due = None  # Tick of the wheel the session is filed under
+
+    def send(self, line):
+        if self.writer.transport.get_write_buffer_size() > MAX_BUFFERED:
+            # Not reading what it is sent
+            self.writer.close()
+        elif not self.writer.is_closing():
+            self.writer.write(line.encode() + b"\n")
+
+
+class TimerWheel:
+    """Sessions filed by the tick they are due on, in a ring of slots
+
+    Filing and cancelling take the same time however many sessions there
+    are, and each tick only looks at the sessions due on it
+    """
+
+    def __init__(self, slots=WHEEL_SLOTS):
+        self.slots = [set() for _ in range(slots)]
+        self.tick = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def schedule(self, session, ticks):
+        """File a session to be due in a number of ticks from now"""
+        if not 0 < ticks < len(self.slots):
+            raise ValueError(f"can only schedule 1 to {len(self.slots) - 1} "
+                             "ticks ahead")
+        self.cancel(session)
+        session.due = self.tick + ticks
+        self.slots[session.due % len(self.slots)].add(session)
+        self.count += 1
+
+    def cancel(self, session):
+        if session.due is not None:
+            self.slots[session.due % len(self.slots)].discard(session)
+            session.due = None
+            self.count -= 1
+
+    def advance(self):
+        """Move on one tick, returning the sessions due on it"""
+        self.tick += 1
+        i = self.tick % len(self.slots)
+        due = self.slots[i]
+        self.slots[i] = set()
+        for session in due:
+            session.due = None
+        self.count -= len(due)
+        return due
+
+
+class SimonServer:
+    def __init__(self, max_rounds=MAX_ROUNDS):
+        self.max_rounds = max_rounds
+        self.wheel = TimerWheel()
+        self.wakeup = asyncio.Event()  # Set when the wheel gets a session
+        self.sessions = 0
+
+    async def handle(self, reader, writer):
+        """Play a game with one client until it leaves"""
+        session = Session(writer, self.max_rounds)
+        self.sessions += 1
+        session.send("READY")
+        try:
+            while not writer.is_closing():
+                line = await reader.readline()
+                if not line:
+                    break
+                self.command(session, line.decode(errors="replace"))
+        except (ValueError, ConnectionError):
+            pass  # A line over MAX_LINE, or the connection was lost
+        finally:
+            self.wheel.cancel(session)
+            self.sessions -= 1
+            writer.close()
+
+    def command(self, session, line):
+        match line.upper().split():
+            case ["START"]:
+                if session.game.state in (GameState.WAITING,
+                                          GameState.GAME_OVER):
+                    session.game.start_game()
+                    self.show(session)
+                else:
+                    session.send("ERROR a game is on")
+            case ["PRESS", button] if button in ("0", "1", "2", "3"):
+                if session.game.state == GameState.LISTENING:
+                    self.press(session, int(button))
+                else:
+                    session.send("ERROR not your turn")
+            case ["QUIT"]:
+                session.send("BYE")
+                session.writer.close()
+            case _:
+                session.send("ERROR unknown command")
+
+    def show(self, session):
+        """Announce the round a game has started showing"""
+        session.send(f"ROUND {len(session.game.sequence)}")
+        self.schedule(session)
+
+    def schedule(self, session):
+        """File a showing game under the frame it next changes on"""
+        game = session.game
+        self.wheel.schedule(session, game.next_change - game.frame)
+        self.wakeup.set()
+
+    def timer(self, session):
+        """Move a game on to the frame it was filed under"""
+        game = session.game
+        game.fast_forward(game.next_change - game.frame)
+        if game.state == GameState.LISTENING:
+            session.send("GO")
+            return
+        if game.current_flash == -1:
+            session.send("OFF")
+        else:
+            session.send(f"FLASH {game.current_flash}")
+        self.schedule(session)
+
+    def press(self, session, button):
+        game = session.game
+        game.handle_player_input(button)
+        if game.state == GameState.SHOWING:
+            self.show(session)
+        elif game.state == GameState.LISTENING:
+            session.send("OK")
+        elif len(game.sequence) == game.score:
+            session.send(f"WIN {game.score}")
+        else:
+            session.send(f"GAME OVER {game.score}")
+
+    async def turn_wheel(self):
+        """Run the timer wheel in time with the clock while it has
+        sessions filed, catching up on any ticks the loop was late for
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        while True:
+            if not self.wheel:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                start = loop.time() - self.wheel.tick * TICK
+            now = int((loop.time() - start) / TICK)
+            while self.wheel.tick < now:
+                for session in self.wheel.advance():
+                    self.timer(session)
+            await asyncio.sleep(start + (now + 1) * TICK - loop.time())
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port,
+                                            limit=MAX_LINE, backlog=BACKLOG)
+        print(f"Simon on {host}:{port}")
+        async with server:
+            await asyncio.gather(server.serve_forever(), self.turn_wheel())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-rounds", type=int, default=MAX_ROUNDS)
+    args = parser.parse_args()
+    try:
+        asyncio.run(SimonServer(args.max_rounds).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
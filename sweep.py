@@ -0,0 +1,144 @@
+"""
+Parameter sweep for the Silver Meteor trip physics
+Every combination of the given train settings and button schedules is
+run as one New York City to Miami trip, spread over a pool of worker
+processes, and summed up in a table
+
+    python sweep.py --acceleration 0.03 0.05 --max-speed 4 5
+    python sweep.py --schedule "" 300,420 --route --json
+"""
+
+import argparse
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from route import Route, FRAME_RATE, SILVER_METEOR
+from train_physics import (State, Destination, STATION_NYC_X,
+                           STATION_MIAMI_X, MILES_PER_PIXEL, MPH_SCALE,
+                           ACCELERATION, MAX_SPEED, press, step)
+
+# Longest trip simulated before giving up, in frames
+MAX_FRAMES = 3600 * FRAME_RATE
+
+# Route used by this worker process, loaded once by init_worker()
+route = None
+
+
+def init_worker(route_file):
+    global route
+    route = Route.load(route_file) if route_file else None
+
+
+def trip(acceleration, max_speed, mph_scale, presses):
+    """Run one trip as the simulator's update() would and measure it
+
+    presses lists the frames on which the button is clicked after the
+    departure click at frame 0, as in trajectory.Trajectory.
+    Returns (frames, peak mph, miles from Miami when the final approach
+    began); frames is None if the train never reached Miami.
+    """
+    x, speed = STATION_NYC_X, 0
+    state, target = press(State.STOPPED), Destination.MIAMI
+    pending = sorted(presses, reverse=True)
+    dwell_left = 0
+    peak = 0
+    onset = None
+
+    for frame in range(1, MAX_FRAMES + 1):
+        if state == State.DWELLING:
+            dwell_left -= 1
+            if dwell_left <= 0:
+                state = State.ACCELERATING
+        else:
+            previous = state
+            x, speed, state, target = step(x, speed, state, target,
+                                           acceleration, max_speed, route)
+            peak = max(peak, speed)
+            if (state == State.DECELERATING and
+                    previous != State.DECELERATING):
+                onset = (STATION_MIAMI_X - x) * MILES_PER_PIXEL
+            elif state == State.DWELLING:
+                dwell_left = route.dwell_frames[route.stop_at(x)]
+
+        if state == State.STOPPED:
+            return frame, peak * mph_scale, onset
+        while pending and pending[-1] <= frame:
+            pending.pop()
+            state = press(state)
+        if state == State.PAUSED and not pending:
+            break
+
+    return None, peak * mph_scale, onset
+
+
+def run_case(case):
+    return case + trip(*case)
+
+
+def sweep(accelerations, max_speeds, mph_scales, schedules,
+          route_file=None, workers=None):
+    """Run every combination on a process pool, returning result rows
+
+    Each row is (acceleration, max speed, mph scale, presses, frames,
+    peak mph, onset miles), in the order of the combinations
+    """
+    cases = list(itertools.product(accelerations, max_speeds, mph_scales,
+                                   schedules))
+    workers = workers or os.cpu_count()
+    # A few chunks per worker keeps them all busy without much messaging
+    chunksize = max(len(cases) // (workers * 4), 1)
+    with ProcessPoolExecutor(workers, initializer=init_worker,
+                             initargs=(route_file,)) as pool:
+        return list(pool.map(run_case, cases, chunksize=chunksize))
+
+
+def schedule(text):
+    """Parse a schedule such as 300,420 into a tuple of frames"""
+    return tuple(int(frame) for frame in text.split(",") if frame)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--acceleration", type=float, nargs="+",
+                        default=[ACCELERATION])
+    parser.add_argument("--max-speed", type=float, nargs="+",
+                        default=[MAX_SPEED])
+    parser.add_argument("--mph-scale", type=float, nargs="+",
+                        default=[MPH_SCALE])
+    parser.add_argument("--schedule", type=schedule, nargs="+", default=[()],
+                        help="frames of button clicks after departure, "
+                        "comma separated (default: none)")
+    parser.add_argument("--route", action="store_true",
+                        help="stop at every Silver Meteor station")
+    parser.add_argument("--workers", type=int,
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--json", action="store_true",
+                        help="print one JSON object per combination")
+    args = parser.parse_args()
+
+    rows = sweep(args.acceleration, args.max_speed, args.mph_scale,
+                 args.schedule, SILVER_METEOR if args.route else None,
+                 args.workers)
+
+    if args.json:
+        names = ("acceleration", "max_speed", "mph_scale", "schedule",
+                 "trip_frames", "peak_mph", "onset_miles")
+        for row in rows:
+            print(json.dumps(dict(zip(names, row))))
+        return
+
+    print(f"{'accel':>7} {'max':>5} {'mph x':>6} {'schedule':12} "
+          f"{'trip s':>9} {'peak mph':>9} {'onset mi':>9}")
+    for accel, max_speed, mph_scale, presses, frames, peak, onset in rows:
+        clicks = ",".join(map(str, presses)) or "-"
+        trip_s = (f"{frames / FRAME_RATE:9.2f}" if frames
+                  else f"{'never':>9}")
+        onset_mi = f"{onset:9.1f}" if onset is not None else f"{'-':>9}"
+        print(f"{accel:7.3f} {max_speed:5g} {mph_scale:6g} {clicks:12} "
+              f"{trip_s} {peak:9.0f} {onset_mi}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Streaming telemetry of the train's state as fixed-size binary records
+The simulator hands one record per physics step to a bounded ring
+buffer, or one for the end of a stretch of cruising or dwelling it runs
+in one go, and a background thread sends them on, to a file or as
+datagrams to a Unix socket another process listens on. If the sink can't
+keep up, the oldest records are dropped; the frame loop never waits
+
+    python telemetry.py listen /tmp/train.sock     print a live stream
+    python telemetry.py dump telemetry.bin          print a file sink
+"""
+
+import argparse
+import os
+import socket
+import struct
+import threading
+from collections import deque
+
+from train_physics import (STATES, STATE_CODES, DESTINATIONS,
+                           DESTINATION_CODES, STATION_NYC_X, STATION_MIAMI_X,
+                           MILES_PER_PIXEL)
+
+# tick, x, speed, state code, destination code, miles to New York City,
+# miles to Miami; 34 bytes. The tick is 64-bit, as in the trip log, since
+# at high time scales it passes 2**32 within hours.
+RECORD = struct.Struct("<QddBBff")
+
+CAPACITY = 4096  # Records held for the sink before the oldest are dropped
+DATAGRAM_RECORDS = 256  # Records sent in one datagram at most
+
+
+class Telemetry:
+    """Ring buffer of records, drained to a sink by a daemon thread
+
+    sink is a file path, or unix:PATH to send datagrams to a socket
+    bound at PATH. Records sent while nothing listens there are dropped.
+    """
+
+    def __init__(self, sink, capacity=CAPACITY):
+        self.sink = sink
+        self.ring = deque(maxlen=capacity)
+        self.sent = 0
+        self.dropped = 0  # Pushed out of the full ring buffer
+        self.unsent = 0  # Refused by the sink
+        self.ready = threading.Event()
+        threading.Thread(target=self.drain, name="telemetry",
+                         daemon=True).start()
+
+    def record(self, tick, x, speed, state, target):
+        """Queue the train's state; called from the physics loop"""
+        if len(self.ring) == self.ring.maxlen:
+            self.dropped += 1
+        self.ring.append(RECORD.pack(
+            tick, x, speed, STATE_CODES[state], DESTINATION_CODES[target],
+            (x - STATION_NYC_X) * MILES_PER_PIXEL,
+            (STATION_MIAMI_X - x) * MILES_PER_PIXEL))
+        self.ready.set()
+
+    def drain(self):
+        if self.sink.startswith("unix:"):
+            send = datagram_sender(self.sink[len("unix:"):])
+        else:
+            send = file_writer(self.sink)
+
+        while True:
+            self.ready.wait()
+            self.ready.clear()
+            while self.ring:
+                batch = []
+                while self.ring and len(batch) < DATAGRAM_RECORDS:
+                    batch.append(self.ring.popleft())
+                try:
+                    send(b"".join(batch))
+                    self.sent += len(batch)
+                except OSError:
+                    self.unsent += len(batch)
+
+
+def datagram_sender(path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+
+    def send(data):
+        sock.sendto(data, path)
+    return send
+
+
+def file_writer(path):
+    f = open(path, "ab")
+
+    def send(data):
+        f.write(data)
+        f.flush()
+    return send
+
+
+def records(data):
+    """Decode records into (tick, x, speed, State, Destination,
+    miles to New York City, miles to Miami) tuples
+    """
+    for tick, x, speed, state, target, nyc, miami in RECORD.iter_unpack(data):
+        yield tick, x, speed, STATES[state], DESTINATIONS[target], nyc, miami
+
+
+def show(data):
+    for tick, x, speed, state, target, nyc, miami in records(data):
+        print(f"{tick:8} x={x:8.3f} speed={speed:6.3f} {state.name:12} "
+              f"to {target.value:14} {nyc:7.1f} mi from NYC, "
+              f"{miami:7.1f} mi from Miami")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+    for command, text in (("listen", "print a live stream"),
+                          ("dump", "print a file sink")):
+        commands.add_parser(command, help=text).add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "dump":
+        with open(args.path, "rb") as f:
+            data = f.read()
+        show(data[:len(data) - len(data) % RECORD.size])
+        return
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    if os.path.exists(args.path):
+        os.unlink(args.path)
+    sock.bind(args.path)
+    try:
+        while True:
+            show(sock.recv(RECORD.size * DATAGRAM_RECORDS))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        os.unlink(args.path)
+
+
+if __name__ == "__main__":
+    main()
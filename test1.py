@@ -1,5 +1,7 @@
 
-import pgzrun
+import game_loop
+game_loop.prepare(__name__)  # Set up as a Pygame Zero program if run
+
 from pgzero.actor import Actor
 from pgzero.keyboard import keyboard
 from pgzero.screen import Screen
@@ -7,9 +9,11 @@ from pgzero.screen import Screen
 screen: Screen
 
 # Create an actor using the 'alien' image (you can replace with any image you have)
-actor = Actor('alien')
+# The image can only be loaded once the program is run, not just imported
+actor = Actor('alien') if game_loop.running() else None
 # Set initial position
-actor.pos = (100, 300)
+if actor is not None:
+    actor.pos = (100, 300)
 
 def draw():
     # Clear the screen
@@ -27,4 +31,4 @@ def update():
 WIDTH = 800
 HEIGHT = 600
 
-pgzrun.go()
\ No newline at end of file
+game_loop.go()
\ No newline at end of file
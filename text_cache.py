@@ -0,0 +1,46 @@
+"""
+Rendered text surfaces shared by the Pygame Zero apps
+Text is rasterised once per (string, fontsize, color) and blitted after
+that; the least recently used surfaces are dropped past MAX_ENTRIES
+"""
+
+from collections import OrderedDict
+
+from pgzero import ptext
+
+MAX_ENTRIES = 256
+
+_surfaces = OrderedDict()
+
+
+def text_surface(text, fontsize, color):
+    """Return the surface for text, rendering it on first use"""
+    key = (text, fontsize, color)
+    surface = _surfaces.get(key)
+    if surface is None:
+        surface = ptext.getsurf(text, fontsize=fontsize, color=color,
+                                cache=False)
+        _surfaces[key] = surface
+        if len(_surfaces) > MAX_ENTRIES:
+            _surfaces.popitem(last=False)
+    else:
+        _surfaces.move_to_end(key)
+    return surface
+
+
+def draw_text(screen, text, fontsize, color, topleft=None, center=None,
+              centerx=None, centery=None):
+    """Blit cached text where screen.draw.text() would have put it"""
+    surface = text_surface(text, fontsize, color)
+    if topleft:
+        x, y = topleft
+        h_anchor = v_anchor = 0
+    else:
+        x, y = center or (centerx, centery)
+        h_anchor = v_anchor = 0.5
+
+    # Round the same way ptext does so the pixels match exactly
+    x = int(round(x - h_anchor * surface.get_width()))
+    y = int(round(y - v_anchor * surface.get_height()))
+    screen.blit(surface, (x, y))
+    return surface, (x, y)
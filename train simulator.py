@@ -3,49 +3,56 @@ Simulation of a train running between New York City and Miami
 A multi-function button handles to train's movement
 """
 
-from enum import Enum
+import game_loop
+game_loop.prepare(__name__)  # Set up as a Pygame Zero program if run
+import math
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
 
-import pgzrun
 import pygame
 from pygame import Rect
 from pgzero.screen import Screen
+from pgzero.keyboard import keyboard
 from pgzero.loaders import sounds
 
-
-class State(Enum):
-    STOPPED = "stopped"           # At station, will reverse on GO
-    ACCELERATING = "accelerating"
-    CRUISING = "cruising"
-    DECELERATING = "decelerating"  # Approaching station
-    BRAKING = "braking"           # User-initiated stop
-    PAUSED = "paused"             # Stopped mid-journey
-
-
-class Destination(Enum):
-    NYC = "New York City"
-    MIAMI = "Miami"
+import assets
+from route import Route, SILVER_METEOR
+from telemetry import Telemetry
+from text_cache import draw_text, text_surface
+from trip_log import TripLog, TripLogView
+from train_physics import (State, Destination, STATION_NYC_X,
+                           STATION_MIAMI_X, MILES_PER_PIXEL, MPH_SCALE,
+                           press, step, cruise_frames)
 
 screen: Screen
 
+# Decode the sounds while the first frames draw, not on first use
+preloader = (assets.preload(sounds=("brake", "whistle"))
+             if game_loop.running() else None)
+
 # Window settings
 TITLE = "Amtrak Silver Meteor"
 WIDTH = 900
 HEIGHT = 450
 
-# Station positions
-STATION_NYC_X = 100
-STATION_MIAMI_X = 800
+# Track position
 TRACK_Y = 320
 
-# Distance scale: 1400 miles between NYC and Miami
-MILES_PER_PIXEL = 1400 / (STATION_MIAMI_X - STATION_NYC_X)
-MPH_SCALE = 30  # Convert pixel speed to mph (MAX_SPEED of 4 = 120 mph)
+# Stop at every station of ROUTE_FILE on the way. Off by default: the
+# stations are too close together for the train to reach full speed
+# between them, so it would never cruise. False runs nonstop between the
+# termini.
+STOP_AT_STATIONS = False
+ROUTE_FILE = SILVER_METEOR
+route = Route.load(ROUTE_FILE) if STOP_AT_STATIONS else None
 
 # Train properties
+TRAIN_COLOR = (180, 0, 0)
+TRAIN_NOSE = 55  # Pixels from the train's x to either tapered end
+TRAIN_TOP = 45  # Pixels from the top of the train down to the track
 train_x = STATION_NYC_X
 train_speed = 0
-MAX_SPEED = 4
-ACCELERATION = 0.05
+dwell_left = 0  # Frames until leaving an intermediate stop
 
 # Initial conditions
 state = State.STOPPED
@@ -54,92 +61,336 @@ target_station = Destination.MIAMI  # Train starts at NYC, heads to Miami
 # GO button
 button = Rect(400, 380, 100, 50)
 
+# Time compression: the physics runs in fixed steps of one TICK of
+# simulated time, as many per frame as the time scale calls for
+TICK = 1 / 60  # Seconds of simulated time per physics step
+TIME_SCALES = (1, 10, 100, 1000, 10000)  # Chosen with the UP and DOWN keys
+MAX_FRAME_TIME = 0.25  # Longest real frame made up for, in seconds
+time_scale = 1
+time_owed = 0.0  # Simulated seconds not yet run by the physics
+ticks = 0  # Physics steps run so far
+
+# Stream the train's state after every physics step to a file, or to a
+# Unix socket as unix:/tmp/train.sock; None for no telemetry
+TELEMETRY = None
+telemetry = Telemetry(TELEMETRY) if TELEMETRY else None
+
+# Trip log: TRIP_LOG names a directory the train's state is added to
+# whenever a physics step changes it. Setting VIEW_LOG to one instead scrubs through
+# it: LEFT and RIGHT run it backward and forward at the time scale, and
+# PAGE UP and PAGE DOWN jump between changes of state.
+TRIP_LOG = None
+VIEW_LOG = None
+trip_log = TripLog(TRIP_LOG) if TRIP_LOG and not VIEW_LOG else None
+logged = None  # State as last added to the trip log
+viewer = TripLogView(VIEW_LOG) if VIEW_LOG else None
+view_tick = 0  # Tick of the log being viewed
+
+
+# Static scenery, rendered once and rebuilt only if the layout changes
+background = None
+background_layout = None
+
+# Train sprites by livery color, painted once and blitted at the train's x
+train_sprites = {}
+
+# Dirty-rectangle mode: repaint and present only the parts that changed.
+# The train, the button and the status lines never overlap, so each one
+# can be restored from the scenery and redrawn on its own.
+DIRTY_RECTS = False
+dirty_rects = None  # Regions changed by the last draw(), None for all
+shown = {}  # Part -> (what was drawn, where) as last drawn
+shown_on = None  # Surface the shown parts are on
+
+# Scrolling mode: the camera follows the train along the track drawn at
+# one of ZOOMS screen pixels per mile, chosen with + and -. The first is
+# the fixed screen's scale and the last is true scale, a pixel for every
+# hundred feet. The track is blitted from tiles painted as they come
+# into view, so a frame costs the same however long the route is.
+SCROLLING = False
+ZOOMS = (1 / MILES_PER_PIXEL, 2, 8, 52.8)
+zoom = ZOOMS[0]
+TILE_WIDTH = 256
+TILE_TOP = TRACK_Y - 90  # Tiles cover the track, stations and their names
+TILE_HEIGHT = 115
+TILE_CACHE = 64  # Tiles kept, least recently used dropped first
+tiles = OrderedDict()  # (zoom, tile number) -> tile
+SKY_COLOR = (135, 206, 235)
+GROUND_COLOR = (210, 180, 140)
+
 
 def draw():
-    # Background (sky)
-    screen.fill((135, 206, 235))
+    global dirty_rects, shown_on
+    if SCROLLING:
+        draw_world(camera_left())
+        draw_parts(full=True)
+        shown_on = None
+        dirty_rects = None
+        return
 
-    # Ground
-    screen.draw.filled_rect(Rect(0, TRACK_Y, WIDTH, HEIGHT - TRACK_Y),
-                            (210, 180, 140))
+    if DIRTY_RECTS and screen.surface is shown_on:
+        dirty_rects = draw_parts()
+        return
 
-    # Draw tracks (rails and ties)
-    for x in range(55, 850, 30):
-        screen.draw.filled_rect(Rect(x, TRACK_Y + 5, 5, 10),
-                                (131, 67, 33))  # Ties
-    screen.draw.filled_rect(Rect(50, TRACK_Y, 800, 5),
-                            (80, 80, 80))  # Top rail
-    screen.draw.filled_rect(Rect(50, TRACK_Y + 15, 800, 5),
-                            (80, 80, 80))  # Bottom rail
+    screen.blit(get_background(), (0, 0))
+    draw_parts(full=True)
+    shown_on = screen.surface
+    dirty_rects = None
 
-    # NYC Station (left) - platform aligned with train stop
-    screen.draw.filled_rect(Rect(STATION_NYC_X - 60, TRACK_Y - 55, 120, 55),
-                            (160, 160, 160))  # Platform base
-    screen.draw.filled_rect(Rect(STATION_NYC_X - 60, TRACK_Y - 5, 120, 5),
-                            (255, 200, 0))  # Yellow safety line at bottom
-    screen.draw.text("New York City", center=(STATION_NYC_X, TRACK_Y - 70),
-                     fontsize=28, color="DarkBlue")
 
-    # Miami Station (right) - platform aligned with train stop
-    screen.draw.filled_rect(Rect(STATION_MIAMI_X - 60,
-                                 TRACK_Y - 55, 120, 55),
-                            (160, 160, 160))  # Platform base
-    screen.draw.filled_rect(Rect(STATION_MIAMI_X - 60, TRACK_Y - 5, 120, 5),
-                            (255, 200, 0))  # Yellow safety line at bottom
-    screen.draw.text("Miami", center=(STATION_MIAMI_X, TRACK_Y - 70),
-                     fontsize=28, color="DarkBlue")
+def draw_parts(full=False):
+    """Draw the train, button and status display
+
+    Unless full is set, only parts that changed since the last call are
+    redrawn, over the scenery, and the regions touched are returned
+    """
+    regions = []
+
+    def changed(part, drawn, rect):
+        old_drawn, old_rect = shown.get(part, (None, rect))
+        shown[part] = (drawn, rect)
+        if full:
+            return True
+        if drawn == old_drawn:
+            return False
+        region = rect.union(old_rect)
+        screen.surface.blit(get_background(), region, region)
+        regions.append(region)
+        return True
 
     # Draw train
-    draw_train(train_x, TRACK_Y)
+    x = train_screen_x()
+    if changed("train", x, train_rect(x, TRACK_Y)):
+        draw_train(x, TRACK_Y)
 
     # Draw buttons based on state
+    if changed("button", state, button):
+        draw_button()
+
+    # Status display
+    for line, (text, pos) in enumerate(status_lines()):
+        rect = text_surface(text, 28, "black").get_rect(topleft=pos)
+        if changed(line, text, rect):
+            draw_text(screen, text, 28, "black", topleft=pos)
+
+    return regions
+
+
+def draw_button():
     match state:
         case State.STOPPED:
             # DEPART button (green) - at station
             screen.draw.filled_rect(button, (0, 180, 0))
             screen.draw.rect(button, (0, 100, 0))
-            screen.draw.text("DEPART", center=button.center, fontsize=32,
-                             color="white")
+            draw_text(screen, "DEPART", 32, "white", center=button.center)
         case State.PAUSED:
             # RESUME button (orange) - paused mid-journey
             screen.draw.filled_rect(button, (255, 180, 0))
             screen.draw.rect(button, (180, 120, 0))
-            screen.draw.text("RESUME", center=button.center, fontsize=32,
-                             color="white")
+            draw_text(screen, "RESUME", 32, "white", center=button.center)
         case State.ACCELERATING | State.CRUISING | State.DECELERATING:
             # STOP button (red) - train is moving
             screen.draw.filled_rect(button, (180, 0, 0))
             screen.draw.rect(button, (100, 0, 0))
-            screen.draw.text("STOP", center=button.center, fontsize=32,
-                             color="white")
+            draw_text(screen, "STOP", 32, "white", center=button.center)
 
-    # Status display
+
+def status_lines():
+    """Return the status display as (text, topleft) pairs"""
     if target_station == Destination.MIAMI:
         route_text = "Silver Meteor - New York City to Miami"
     else:
         route_text = "Silver Meteor - Miami to New York City"
-    screen.draw.text(route_text, topleft=(20, 20),
-                     fontsize=28, color="black")
 
     dist_to_nyc = (train_x - STATION_NYC_X) * MILES_PER_PIXEL
     dist_to_miami = (STATION_MIAMI_X - train_x) * MILES_PER_PIXEL
-    screen.draw.text(f"Distance to New York City: {dist_to_nyc:.0f} miles",
-                     topleft=(20, 45), fontsize=28, color="black")
-    screen.draw.text(f"Distance to Miami: {dist_to_miami:.0f} miles",
-                     topleft=(20, 70), fontsize=28, color="black")
-    screen.draw.text(f"Speed: {train_speed * MPH_SCALE:.0f} mph",
-                     topleft=(20, 95), fontsize=28, color="black")
+    lines = [
+        (route_text, (20, 20)),
+        (f"Distance to New York City: {dist_to_nyc:.0f} miles", (20, 45)),
+        (f"Distance to Miami: {dist_to_miami:.0f} miles", (20, 70)),
+        (f"Speed: {train_speed * MPH_SCALE:.0f} mph", (20, 95)),
+        (f"Time: {time_scale}x", (WIDTH - 150, 20)),
+    ]
+    if viewer is not None:
+        seconds = round(ticks * TICK)
+        clock = f"{seconds // 3600}:{seconds // 60 % 60:02}:{seconds % 60:02}"
+        lines.append((f"Log: {clock}", (WIDTH - 150, 45)))
+    if SCROLLING:
+        lines.append((f"{5280 / zoom:,.0f} ft/px", (WIDTH - 150, 70)))
+    if route is not None:
+        if state == State.DWELLING:
+            stop = route.names[route.stop_at(train_x)]
+            lines.append((f"Now at: {stop}", (20, 120)))
+        else:
+            stop = route.names[route.ahead(train_x, target_station)]
+            lines.append((f"Next stop: {stop}", (20, 120)))
+    return lines
+
+
+def get_background():
+    """Return the scenery surface, redrawing it if the layout changed"""
+    global background, background_layout
+    layout = (WIDTH, HEIGHT, TRACK_Y, STATION_NYC_X, STATION_MIAMI_X, route)
+    if layout != background_layout:
+        background = pygame.Surface((WIDTH, HEIGHT)).convert()
+        draw_scenery(Screen(background))
+        background_layout = layout
+    return background
+
+
+def draw_scenery(scenery):
+    """Draw the sky, ground, track and stations, none of which move"""
+    # Background (sky)
+    scenery.fill(SKY_COLOR)
+
+    # Ground
+    scenery.draw.filled_rect(Rect(0, TRACK_Y, WIDTH, HEIGHT - TRACK_Y),
+                             GROUND_COLOR)
+
+    draw_track(scenery, -STATION_NYC_X, 0, ZOOMS[0])
+
+
+def draw_track(canvas, left, top, scale):
+    """Draw the track and stations at scale pixels per mile
+
+    left is the world x at the canvas's left edge, counted from New York
+    City, and top the screen y at its top edge. Only what falls on the
+    canvas is drawn.
+    """
+    right = left + canvas.surface.get_width()
+    track_y = TRACK_Y - top
+    miami = world_x(STATION_MIAMI_X, scale)
+
+    # Draw tracks (rails and ties), from 50 pixels beyond each terminus
+    start = -50
+    end = round(miami) + 50
+    for x in range(max(start + 5, left - (left - start - 5) % 30),
+                   min(end, right), 30):
+        canvas.draw.filled_rect(Rect(x - left, track_y + 5, 5, 10),
+                                (131, 67, 33))  # Ties
+    rail_left = max(start, left)
+    rail_width = min(end, right) - rail_left
+    if rail_width > 0:
+        canvas.draw.filled_rect(Rect(rail_left - left, track_y, rail_width,
+                                     5), (80, 80, 80))  # Top rail
+        canvas.draw.filled_rect(Rect(rail_left - left, track_y + 15,
+                                     rail_width, 5),
+                                (80, 80, 80))  # Bottom rail
+
+    # Intermediate stations - a small platform post at each stop
+    if route is not None:
+        first = max(bisect_left(route.x, track_x(left - 2, scale)), 1)
+        last = min(bisect_right(route.x, track_x(right + 2, scale)),
+                   len(route) - 1)
+        for x in route.x[first:last]:
+            x = world_x(x, scale) - left
+            canvas.draw.filled_rect(Rect(x - 2, track_y - 12, 4, 12),
+                                    (160, 160, 160))
+
+    # NYC Station (left) and Miami Station (right)
+    for x, name in ((0, "New York City"), (miami, "Miami")):
+        if left - 100 < x < right + 100:
+            draw_terminus(canvas, x - left, track_y, name)
+
+
+def draw_terminus(canvas, x, track_y, name):
+    # Platform aligned with train stop
+    canvas.draw.filled_rect(Rect(x - 60, track_y - 55, 120, 55),
+                            (160, 160, 160))  # Platform base
+    canvas.draw.filled_rect(Rect(x - 60, track_y - 5, 120, 5),
+                            (255, 200, 0))  # Yellow safety line at bottom
+    canvas.draw.text(name, center=(x, track_y - 70), fontsize=28,
+                     color="DarkBlue")
+
+
+def world_x(x, scale):
+    """Pixels from New York City to track position x at scale"""
+    return (x - STATION_NYC_X) * (MILES_PER_PIXEL * scale)
+
+
+def track_x(x, scale):
+    """Track position of world x at scale, the inverse of world_x()"""
+    return STATION_NYC_X + x / (MILES_PER_PIXEL * scale)
+
+
+def camera_left():
+    """World x of the screen's left edge, keeping the train centred
+    until a terminus is in as far as on the fixed screen
+    """
+    left = world_x(train_x, zoom) - WIDTH / 2
+    left = min(left, world_x(STATION_MIAMI_X, zoom) - STATION_MIAMI_X)
+    return math.floor(max(left, -STATION_NYC_X))
+
 
+def train_screen_x():
+    if SCROLLING:
+        return world_x(train_x, zoom) - camera_left()
+    return train_x
 
-def draw_train(x, track_y):
+
+def draw_world(left):
+    """Draw the sky, ground and the track tiles in view"""
+    screen.fill(SKY_COLOR)
+    screen.draw.filled_rect(Rect(0, TRACK_Y, WIDTH, HEIGHT - TRACK_Y),
+                            GROUND_COLOR)
+    first = left // TILE_WIDTH
+    last = (left + WIDTH - 1) // TILE_WIDTH
+    screen.surface.blits(
+        ((get_tile(i), (i * TILE_WIDTH - left, TILE_TOP))
+         for i in range(first, last + 1)), doreturn=False)
+
+
+def get_tile(i):
+    """Return tile i of the track at the current zoom, painting it if
+    it is not cached
+    """
+    key = (zoom, i)
+    tile = tiles.get(key)
+    if tile is not None:
+        tiles.move_to_end(key)
+        return tile
+
+    tile = pygame.Surface((TILE_WIDTH, TILE_HEIGHT)).convert()
+    tile.fill(SKY_COLOR)
+    tile.fill(GROUND_COLOR, Rect(0, TRACK_Y - TILE_TOP, TILE_WIDTH,
+                                 TILE_HEIGHT))
+    draw_track(Screen(tile), i * TILE_WIDTH, TILE_TOP, zoom)
+    tiles[key] = tile
+    if len(tiles) > TILE_CACHE:
+        tiles.popitem(last=False)
+    return tile
+
+
+def train_rect(x, track_y):
+    """Return a rect that covers everything draw_train() paints"""
+    return Rect(int(x) - 57, track_y - 46, 115, 53)
+
+
+def draw_train(x, track_y, color=TRAIN_COLOR):
+    sprite = get_train_sprite(color)
+    screen.blit(sprite, (int(x) - TRAIN_NOSE, track_y - TRAIN_TOP))
+
+
+def get_train_sprite(color=TRAIN_COLOR):
+    """Return the train painted in a livery color, painting it once"""
+    sprite = train_sprites.get(color)
+    if sprite is None:
+        sprite = pygame.Surface((2 * TRAIN_NOSE + 1, TRAIN_TOP + 6),
+                                pygame.SRCALPHA)
+        paint_train(Screen(sprite), TRAIN_NOSE, TRAIN_TOP, color)
+        sprite = sprite.convert_alpha()
+        train_sprites[color] = sprite
+    return sprite
+
+
+def paint_train(canvas, x, track_y, color):
     # Modern train with tapered front and back
     body_top = track_y - 45
     body_bottom = track_y - 10
     body_height = body_bottom - body_top
 
     # Main rectangular body (center section)
-    screen.draw.filled_rect(Rect(x - 35, body_top, 70, body_height),
-                            (180, 0, 0))
+    canvas.draw.filled_rect(Rect(x - 35, body_top, 70, body_height), color)
 
     # Front taper (right side) - polygon
     front_points = [
@@ -147,7 +398,7 @@ def draw_train(x, track_y):
         (x + 55, body_top + body_height // 2),  # Nose point
         (x + 35, body_bottom)         # Bottom left of taper
     ]
-    pygame.draw.polygon(screen.surface, (180, 0, 0), front_points)
+    pygame.draw.polygon(canvas.surface, color, front_points)
 
     # Back taper (left side) - polygon
     back_points = [
@@ -155,116 +406,169 @@ def draw_train(x, track_y):
         (x - 55, body_top + body_height // 2),  # Nose point
         (x - 35, body_bottom)         # Bottom right of taper
     ]
-    pygame.draw.polygon(screen.surface, (180, 0, 0), back_points)
+    pygame.draw.polygon(canvas.surface, color, back_points)
 
     # Windows (symmetrical)
-    screen.draw.filled_rect(Rect(x - 25, body_top + 5, 12, 12),
+    canvas.draw.filled_rect(Rect(x - 25, body_top + 5, 12, 12),
                             (200, 230, 255))
-    screen.draw.filled_rect(Rect(x - 5, body_top + 5, 12, 12),
+    canvas.draw.filled_rect(Rect(x - 5, body_top + 5, 12, 12),
                             (200, 230, 255))
-    screen.draw.filled_rect(Rect(x + 13, body_top + 5, 12, 12),
+    canvas.draw.filled_rect(Rect(x + 13, body_top + 5, 12, 12),
                             (200, 230, 255))
 
     # Stripe along the body
-    screen.draw.filled_rect(Rect(x - 35,
+    canvas.draw.filled_rect(Rect(x - 35,
                                  body_top + body_height // 2 - 2, 70, 4),
                             (255, 255, 255))
 
     # Wheels
-    screen.draw.filled_circle((x - 25, track_y - 5), 10, (40, 40, 40))
-    screen.draw.filled_circle((x, track_y - 5), 10, (40, 40, 40))
-    screen.draw.filled_circle((x + 25, track_y - 5), 10, (40, 40, 40))
+    canvas.draw.filled_circle((x - 25, track_y - 5), 10, (40, 40, 40))
+    canvas.draw.filled_circle((x, track_y - 5), 10, (40, 40, 40))
+    canvas.draw.filled_circle((x + 25, track_y - 5), 10, (40, 40, 40))
 
     # Wheel centers
-    screen.draw.filled_circle((x - 25, track_y - 5), 4, (100, 100, 100))
-    screen.draw.filled_circle((x, track_y - 5), 4, (100, 100, 100))
-    screen.draw.filled_circle((x + 25, track_y - 5), 4, (100, 100, 100))
-
-
-def update():
-    global train_x, train_speed, state, target_station
+    canvas.draw.filled_circle((x - 25, track_y - 5), 4, (100, 100, 100))
+    canvas.draw.filled_circle((x, track_y - 5), 4, (100, 100, 100))
+    canvas.draw.filled_circle((x + 25, track_y - 5), 4, (100, 100, 100))
 
-    # Nothing to do this time
-    if state in (State.STOPPED, State.PAUSED):
-        return
 
-    # Handle user-initiated braking
-    if state == State.BRAKING:
-        train_speed -= ACCELERATION
-        if train_speed <= 0:
-            train_speed = 0
-            state = State.PAUSED
-        else:
-            # Continue moving while braking
-            if target_station == Destination.MIAMI:
-                train_x += train_speed
-            else:
-                train_x -= train_speed
+def update(dt=TICK):
+    """Run the physics for dt seconds of real time at the time scale"""
+    global time_owed, ticks
+    if viewer is not None:
+        scrub(dt)
         return
 
-    if state == State.ACCELERATING:
-        train_speed += ACCELERATION
-        if train_speed >= MAX_SPEED:
-            train_speed = MAX_SPEED
-            state = State.CRUISING
-
-    # Calculate stopping distance using physics: d = v^2 / (2*a)
-    stopping_distance = (train_speed ** 2) / (2 * ACCELERATION)
+    time_owed += min(dt, MAX_FRAME_TIME) * time_scale
+    steps, time_owed = divmod(time_owed, TICK)
+    steps = int(steps)
+
+    # However many steps a frame covers, each sound plays at most once
+    played = set()
+    while steps > 0:
+        done = advance(steps, played)
+        steps -= done
+        ticks += done
+        record_state()
+    for name in played:
+        getattr(sounds, name).play()
+
+
+def record_state():
+    """Send the train's state to telemetry, and to the trip log if it
+    changed, after each run of advance()
+
+    That is every physics step that runs on its own, and the end of each
+    stretch covered in one go, whose start is the run before it, so the
+    rows do not depend on the time scale
+    """
+    global logged
+    if telemetry is not None:
+        telemetry.record(ticks, train_x, train_speed, state, target_station)
+    if (trip_log is not None and
+            logged != (train_x, train_speed, state, target_station)):
+        logged = (train_x, train_speed, state, target_station)
+        trip_log.append(ticks, *logged)
+
+
+def scrub(dt):
+    """Run through the trip log while LEFT or RIGHT is held"""
+    global view_tick
+    direction = keyboard.right - keyboard.left
+    view_tick += direction * min(dt, MAX_FRAME_TIME) * time_scale / TICK
+    if len(viewer):
+        view_tick = min(max(view_tick, viewer.tick[0]), viewer.tick[-1])
+        show_row(viewer.row_at(view_tick))
+
+
+def show_row(i):
+    """Put the train where row i of the trip log has it"""
+    global ticks, train_x, train_speed, state, target_station
+    ticks, train_x, train_speed, state, target_station = viewer.row(i)
+
+
+def advance(steps, played):
+    """Run up to steps physics steps, returning how many were run
+
+    Stretches where nothing can change but the position or the dwell
+    count are covered in one go; everything else runs a step at a time,
+    so the train still stops exactly at each station
+    """
+    global train_x, train_speed, state, target_station, dwell_left
 
-    if target_station == Destination.MIAMI:
-        train_x += train_speed
-        distance_to_target = STATION_MIAMI_X - train_x
-
-        # Start decelerating when we need to
-        if (distance_to_target <= stopping_distance and
-                state in (State.ACCELERATING, State.CRUISING)):
-            sounds.brake.play()
-            state = State.DECELERATING
-
-        if state == State.DECELERATING:
-            train_speed -= ACCELERATION
-            if train_speed <= 0 or train_x >= STATION_MIAMI_X:
-                train_speed = 0
-                train_x = STATION_MIAMI_X
-                state = State.STOPPED
-                target_station = Destination.NYC
-
-    else:  # Going to NYC
-        train_x -= train_speed
-        distance_to_target = train_x - STATION_NYC_X
-
-        # Start decelerating when we need to
-        if (distance_to_target <= stopping_distance and
-                state in (State.ACCELERATING, State.CRUISING)):
-            sounds.brake.play()
-            state = State.DECELERATING
-
-        if state == State.DECELERATING:
-            train_speed -= ACCELERATION
-            if train_speed <= 0 or train_x <= STATION_NYC_X:
-                train_speed = 0
-                train_x = STATION_NYC_X
-                state = State.STOPPED
-                target_station = Destination.MIAMI
+    match state:
+        case State.STOPPED | State.PAUSED:
+            # Waiting for the button
+            return steps
+        case State.DWELLING:
+            # Leave an intermediate stop once its dwell time is up
+            run = min(steps, dwell_left)
+            dwell_left -= run
+            if dwell_left <= 0:
+                played.add("whistle")
+                state = State.ACCELERATING
+            return max(run, 1)
+        case State.CRUISING:
+            run = min(steps, cruise_frames(train_x, train_speed,
+                                           target_station, route=route))
+            if run > 1:
+                if target_station == Destination.MIAMI:
+                    train_x += run * train_speed
+                else:
+                    train_x -= run * train_speed
+                return run
+
+    previous = state
+    train_x, train_speed, state, target_station = step(
+        train_x, train_speed, state, target_station, route=route)
+
+    # Brake sound when the automatic approach to a station begins
+    if (previous in (State.ACCELERATING, State.CRUISING) and
+            state in (State.DECELERATING, State.STOPPED, State.DWELLING)):
+        played.add("brake")
+
+    if state == State.DWELLING:
+        dwell_left = route.dwell_frames[route.stop_at(train_x)]
+    return 1
+
+
+def idle():
+    """The scene stays the same until the button is clicked"""
+    return viewer is None and state in (State.STOPPED, State.PAUSED)
 
 
 def on_mouse_down(pos):
     global state
-    if not button.collidepoint(pos):
+    if viewer is not None or not button.collidepoint(pos):
         return
 
-    match state:
-        case State.STOPPED:
-            # GO button - start from station
-            sounds.whistle.play()
-            state = State.ACCELERATING
-        case State.PAUSED:
-            # START button - resume from pause
-            sounds.whistle.play()
-            state = State.ACCELERATING
-        case State.ACCELERATING | State.CRUISING | State.DECELERATING:
-            # STOP button - begin braking
-            sounds.brake.play()
-            state = State.BRAKING
-
-pgzrun.go()
+    previous = state
+    state = press(state)
+    if state == State.BRAKING:
+        # STOP button - begin braking
+        sounds.brake.play()
+    elif state != previous:
+        # GO / RESUME button - leave the station or resume from pause
+        sounds.whistle.play()
+
+
+def on_key_down(key):
+    global time_scale, view_tick, zoom
+    i = TIME_SCALES.index(time_scale)
+    if key == pygame.K_UP:
+        time_scale = TIME_SCALES[min(i + 1, len(TIME_SCALES) - 1)]
+    elif key == pygame.K_DOWN:
+        time_scale = TIME_SCALES[max(i - 1, 0)]
+    elif SCROLLING and key in (pygame.K_EQUALS, pygame.K_PLUS,
+                               pygame.K_KP_PLUS):
+        zoom = ZOOMS[min(ZOOMS.index(zoom) + 1, len(ZOOMS) - 1)]
+    elif SCROLLING and key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+        zoom = ZOOMS[max(ZOOMS.index(zoom) - 1, 0)]
+    elif viewer is not None and len(viewer):
+        row = viewer.row_at(view_tick)
+        if key == pygame.K_PAGEDOWN:
+            view_tick = viewer.tick[viewer.next_change(row)]
+        elif key == pygame.K_PAGEUP:
+            view_tick = viewer.tick[viewer.previous_change(row)]
+
+game_loop.go()
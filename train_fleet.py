@@ -0,0 +1,137 @@
+"""
+Headless fleet of independent trains advanced together with NumPy
+Each tick applies the same state machine as train_physics.step()
+to every train at once, so capacity studies run without a window
+"""
+
+import numpy as np
+
+from train_physics import (State, Destination, STATE_CODES, STATES,
+                           STATION_NYC_X, STATION_MIAMI_X,
+                           ACCELERATION, MAX_SPEED, EPSILON)
+
+STOPPED = STATE_CODES[State.STOPPED]
+ACCELERATING = STATE_CODES[State.ACCELERATING]
+CRUISING = STATE_CODES[State.CRUISING]
+DECELERATING = STATE_CODES[State.DECELERATING]
+BRAKING = STATE_CODES[State.BRAKING]
+PAUSED = STATE_CODES[State.PAUSED]
+
+
+class Fleet:
+    def __init__(self, count, acceleration=ACCELERATION,
+                 max_speed=MAX_SPEED):
+        self.acceleration = acceleration
+        self.max_speed = max_speed
+
+        # Every train starts at NYC, heading to Miami
+        self.x = np.full(count, STATION_NYC_X, dtype=np.float64)
+        self.speed = np.zeros(count, dtype=np.float64)
+        self.state = np.full(count, STOPPED, dtype=np.int8)
+        # Direction of travel: +1 toward Miami, -1 toward New York City
+        self.direction = np.ones(count, dtype=np.int8)
+
+        # Scratch masks reused every tick to avoid allocations
+        self._active = np.empty(count, dtype=bool)
+        self._mask = np.empty(count, dtype=bool)
+
+    def __len__(self):
+        return len(self.x)
+
+    def train(self, i):
+        """Return train i as (x, speed, state, target) like step() uses"""
+        target = (Destination.MIAMI if self.direction[i] > 0
+                  else Destination.NYC)
+        return (float(self.x[i]), float(self.speed[i]),
+                STATES[self.state[i]], target)
+
+    def press(self, which=None):
+        """Press the multi-function button of the selected trains
+
+        which is a boolean mask or index array; None selects every train
+        """
+        selected = np.zeros(len(self), dtype=bool)
+        selected[slice(None) if which is None else which] = True
+        s = self.state
+
+        go = selected & ((s == STOPPED) | (s == PAUSED))
+        stop = selected & ((s == ACCELERATING) | (s == CRUISING) |
+                           (s == DECELERATING))
+        s[go] = ACCELERATING
+        s[stop] = BRAKING
+
+    def step(self):
+        """Advance every train by one frame
+
+        Returns a boolean mask of the trains that began their automatic
+        approach to a station this tick (where the brake sound plays)
+        """
+        a = self.acceleration
+        x, v, s, d = self.x, self.speed, self.state, self.direction
+        mask = self._mask
+
+        # Handle user-initiated braking
+        braking = s == BRAKING
+        np.subtract(v, a, out=v, where=braking)
+        np.less_equal(v, EPSILON, out=mask)
+        mask &= braking
+        v[mask] = 0
+        s[mask] = PAUSED
+        braking &= ~mask
+        # Continue moving while braking
+        np.add(x, d * v, out=x, where=braking)
+
+        # Trains under power or approaching a station
+        active = self._active
+        np.equal(s, ACCELERATING, out=active)
+        np.add(v, a, out=v, where=active)
+        np.greater_equal(v, self.max_speed - EPSILON, out=mask)
+        mask &= active
+        v[mask] = self.max_speed
+        s[mask] = CRUISING
+        active |= s == CRUISING
+        onset = active.copy()
+        active |= s == DECELERATING
+
+        # Calculate stopping distance using physics: d = v^2 / (2*a)
+        stopping_distance = (v ** 2) / (2 * a)
+
+        np.add(x, d * v, out=x, where=active)
+        towards_miami = d > 0
+        distance_to_target = np.where(towards_miami,
+                                      STATION_MIAMI_X - x,
+                                      x - STATION_NYC_X)
+
+        # Start decelerating when we need to
+        onset &= distance_to_target <= stopping_distance + EPSILON
+        s[onset] = DECELERATING
+
+        decelerating = active & (s == DECELERATING)
+        np.subtract(v, a, out=v, where=decelerating)
+        arrived = decelerating & (
+            (v <= EPSILON) | np.where(towards_miami,
+                                      x >= STATION_MIAMI_X - EPSILON,
+                                      x <= STATION_NYC_X + EPSILON))
+        v[arrived] = 0
+        x[arrived] = np.where(towards_miami[arrived],
+                              STATION_MIAMI_X, STATION_NYC_X)
+        s[arrived] = STOPPED
+        d[arrived] = -d[arrived]
+
+        return onset
+
+    def run(self, ticks):
+        """Advance every train by the given number of frames"""
+        for _ in range(ticks):
+            self.step()
+
+
+if __name__ == "__main__":
+    import time
+
+    fleet = Fleet(10_000)
+    fleet.press()
+    start = time.perf_counter()
+    fleet.run(1_000)
+    elapsed = time.perf_counter() - start
+    print(f"{len(fleet) * 1_000 / elapsed:,.0f} train-ticks per second")
@@ -0,0 +1,162 @@
+"""
+Several trains sharing the single NYC-Miami track, kept apart by
+fixed-block signals
+Trains enter at one terminus and leave the line on reaching the other.
+Each one only looks at the train ahead of it, so a tick costs the same
+per train however many are on the line
+"""
+
+import math
+
+from train_physics import (State, Destination, STATION_NYC_X,
+                           STATION_MIAMI_X, ACCELERATION, MAX_SPEED,
+                           step, stopping_distance)
+
+BLOCK_LENGTH = 10  # Pixels between signals (20 miles)
+TRAIN_LENGTH = 0.25  # Pixels (half a mile)
+
+
+class Train:
+    def __init__(self, number, x, target):
+        self.number = number
+        self.x = x
+        self.speed = 0
+        self.state = State.ACCELERATING
+        self.target = target
+        self.dwell_left = 0  # Frames until leaving an intermediate stop
+
+
+class Line:
+    """Trains running one way along the track, leading train first
+
+    Trains on one track can't pass, so the list stays in position order
+    as they move: new trains join at the back and arrivals leave from the
+    front, and the train ahead of each one is the one before it.
+
+    A train may not enter a block of track holding any part of the train
+    ahead. It brakes for the signal at the start of that block by the
+    same stopping-distance rule as for a station, waits there PAUSED and
+    sets off again once a whole block ahead of it is clear.
+    """
+
+    def __init__(self, target=Destination.MIAMI, block_length=BLOCK_LENGTH,
+                 train_length=TRAIN_LENGTH, acceleration=ACCELERATION,
+                 max_speed=MAX_SPEED, route=None):
+        self.target = target
+        self.block_length = block_length
+        self.train_length = train_length
+        self.acceleration = acceleration
+        self.max_speed = max_speed
+        self.route = route
+
+        # Trains start from the far end of the line from their target
+        if target == Destination.MIAMI:
+            self.origin, self.direction = STATION_NYC_X, 1
+        else:
+            self.origin, self.direction = STATION_MIAMI_X, -1
+
+        self.trains = []
+        self.frame = 0
+        self.dispatched = 0
+        self.arrivals = []  # (train number, frame it arrived)
+
+    def __len__(self):
+        return len(self.trains)
+
+    def progress(self, x):
+        """Distance along the line from the origin to x"""
+        return (x - self.origin) * self.direction
+
+    def limit(self, ahead):
+        """Furthest progress a train following ahead may have
+
+        That is up to the signal protecting the block that holds the
+        rear of the train ahead
+        """
+        rear = self.progress(ahead.x) - self.train_length / 2
+        signal = math.floor(rear / self.block_length) * self.block_length
+        return signal - self.train_length / 2
+
+    def dispatch(self):
+        """Start a new train from the origin if its block is clear
+
+        Returns the train, or None if the line is blocked
+        """
+        if self.trains and self.limit(self.trains[-1]) < 0:
+            return None
+        train = Train(self.dispatched, self.origin, self.target)
+        self.dispatched += 1
+        self.trains.append(train)
+        return train
+
+    def step(self):
+        """Advance every train on the line by one frame"""
+        self.frame += 1
+        ahead = None
+        for train in self.trains:
+            limit = self.limit(ahead) if ahead is not None else None
+            self.step_train(train, limit)
+            ahead = train
+
+        # Only the leading train can have reached the terminus
+        while self.trains and self.trains[0].state == State.STOPPED:
+            self.arrivals.append((self.trains.pop(0).number, self.frame))
+
+    def step_train(self, train, limit):
+        if train.state == State.DWELLING:
+            # Leave an intermediate stop once its dwell time is up
+            train.dwell_left -= 1
+            if train.dwell_left <= 0:
+                train.state = State.ACCELERATING
+            return
+
+        if limit is None:
+            room = math.inf
+        else:
+            room = limit - self.progress(train.x)
+        if train.state == State.PAUSED:
+            # Held at a signal until a block ahead clears
+            if room < self.block_length:
+                return
+            train.state = State.ACCELERATING
+        elif (train.state != State.BRAKING and room - train.speed <=
+                stopping_distance(train.speed, self.acceleration)):
+            train.state = State.BRAKING
+
+        train.x, train.speed, train.state, train.target = step(
+            train.x, train.speed, train.state, train.target,
+            self.acceleration, self.max_speed, self.route)
+
+        if limit is not None and self.progress(train.x) > limit:
+            # Never pass a red signal, whatever the rounding
+            train.x = self.origin + limit * self.direction
+            train.speed = 0
+            train.state = State.PAUSED
+        elif train.state == State.DWELLING:
+            train.dwell_left = self.route.dwell_frames[
+                self.route.stop_at(train.x)]
+
+    def run(self, ticks, headway=0):
+        """Run for a number of ticks, dispatching a train every headway
+        ticks (or as soon as the line allows, if it is later)
+        """
+        due = self.frame
+        for _ in range(ticks):
+            if headway and self.frame >= due and self.dispatch():
+                due = self.frame + headway
+            self.step()
+
+
+if __name__ == "__main__":
+    import time
+
+    # A line full of trains two blocks apart, leading train first
+    line = Line(block_length=1)
+    line.trains = [Train(n, STATION_MIAMI_X - 1 - 2 * n, Destination.MIAMI)
+                   for n in range(300)]
+    line.dispatched = len(line.trains)
+    start = time.perf_counter()
+    line.run(10_000, headway=1)
+    elapsed = time.perf_counter() - start
+    print(f"{len(line.arrivals)} arrivals, {len(line)} trains on the line, "
+          f"{line.frame / elapsed:,.0f} ticks per second")
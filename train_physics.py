@@ -0,0 +1,173 @@
+"""
+Physics of the Silver Meteor train, kept free of any window or sound
+so the simulator and the headless tools share one state machine
+"""
+
+from enum import Enum
+
+
+class State(Enum):
+    STOPPED = "stopped"           # At station, will reverse on GO
+    ACCELERATING = "accelerating"
+    CRUISING = "cruising"
+    DECELERATING = "decelerating"  # Approaching station
+    BRAKING = "braking"           # User-initiated stop
+    PAUSED = "paused"             # Stopped mid-journey
+    DWELLING = "dwelling"         # At an intermediate stop of a route
+
+
+class Destination(Enum):
+    NYC = "New York City"
+    MIAMI = "Miami"
+
+
+# Compact integer codes for array and binary storage of a State
+STATES = tuple(State)
+STATE_CODES = {s: code for code, s in enumerate(STATES)}
+DESTINATIONS = tuple(Destination)
+DESTINATION_CODES = {d: code for code, d in enumerate(DESTINATIONS)}
+
+# Station positions
+STATION_NYC_X = 100
+STATION_MIAMI_X = 800
+
+# Distance scale: 1400 miles between NYC and Miami
+MILES_PER_PIXEL = 1400 / (STATION_MIAMI_X - STATION_NYC_X)
+MPH_SCALE = 30  # Convert pixel speed to mph (MAX_SPEED of 4 = 120 mph)
+
+# Train properties
+MAX_SPEED = 4
+ACCELERATION = 0.05
+
+# Allowance for rounding: a speed or distance this close to a limit has
+# reached it. Adding up the speed frame by frame leaves it a hair off
+# the exact value, 5.8e-15 instead of 0 at the end of a stop, and
+# trajectory.py, which works the same limits out in closed form, uses
+# this too so that both end each phase on the same frame.
+EPSILON = 1e-9
+
+
+def press(state):
+    """Return the state after the multi-function button is pressed"""
+    match state:
+        case State.STOPPED | State.PAUSED:
+            # GO / RESUME
+            return State.ACCELERATING
+        case State.ACCELERATING | State.CRUISING | State.DECELERATING:
+            # STOP - begin braking
+            return State.BRAKING
+    return state
+
+
+def stopping_distance(speed, acceleration=ACCELERATION):
+    """Distance a train needs to stop from speed: d = v^2 / (2*a)"""
+    return (speed ** 2) / (2 * acceleration)
+
+
+def next_station(x, target, route=None):
+    """Return the x of the station to stop at next, and if it is a terminus"""
+    if route is None:
+        if target == Destination.MIAMI:
+            return STATION_MIAMI_X, True
+        return STATION_NYC_X, True
+    i = route.ahead(x, target)
+    return route.x[i], route.is_terminus(i)
+
+
+def cruise_frames(x, speed, target, acceleration=ACCELERATION, route=None):
+    """Frames a cruising train can run before step() might start braking
+
+    Running the train that many frames at a constant speed lands it
+    where step() would, so long stretches can be covered in one move
+    """
+    station, _ = next_station(x, target, route)
+    if target == Destination.MIAMI:
+        distance_to_target = station - x
+    else:
+        distance_to_target = x - station
+    room = distance_to_target - stopping_distance(speed, acceleration)
+
+    # One frame in hand for rounding
+    frames = int(room / speed) - 1
+    return max(frames, 0)
+
+
+def step(x, speed, state, target,
+         acceleration=ACCELERATION, max_speed=MAX_SPEED, route=None):
+    """Advance one train by one frame
+
+    Without a route the train runs between the two terminal stations.
+    With one it stops at every station of the route, arriving at an
+    intermediate one in the DWELLING state; the caller times the dwell
+    and sets ACCELERATING to leave.
+
+    Returns the new (x, speed, state, target)
+    """
+    # Nothing to do this time
+    if state in (State.STOPPED, State.PAUSED, State.DWELLING):
+        return x, speed, state, target
+
+    # Handle user-initiated braking
+    if state == State.BRAKING:
+        speed -= acceleration
+        if speed <= EPSILON:
+            speed = 0
+            state = State.PAUSED
+        else:
+            # Continue moving while braking
+            if target == Destination.MIAMI:
+                x += speed
+            else:
+                x -= speed
+        return x, speed, state, target
+
+    if state == State.ACCELERATING:
+        speed += acceleration
+        if speed >= max_speed - EPSILON:
+            speed = max_speed
+            state = State.CRUISING
+
+    station, terminus = next_station(x, target, route)
+    braking_distance = stopping_distance(speed, acceleration)
+
+    if target == Destination.MIAMI:
+        x += speed
+        distance_to_target = station - x
+
+        # Start decelerating when we need to
+        if (distance_to_target <= braking_distance + EPSILON and
+                state in (State.ACCELERATING, State.CRUISING)):
+            state = State.DECELERATING
+
+        if state == State.DECELERATING:
+            speed -= acceleration
+            if speed <= EPSILON or x >= station - EPSILON:
+                speed = 0
+                x = station
+                if terminus:
+                    state = State.STOPPED
+                    target = Destination.NYC
+                else:
+                    state = State.DWELLING
+
+    else:  # Going to NYC
+        x -= speed
+        distance_to_target = x - station
+
+        # Start decelerating when we need to
+        if (distance_to_target <= braking_distance + EPSILON and
+                state in (State.ACCELERATING, State.CRUISING)):
+            state = State.DECELERATING
+
+        if state == State.DECELERATING:
+            speed -= acceleration
+            if speed <= EPSILON or x <= station + EPSILON:
+                speed = 0
+                x = station
+                if terminus:
+                    state = State.STOPPED
+                    target = Destination.MIAMI
+                else:
+                    state = State.DWELLING
+
+    return x, speed, state, target
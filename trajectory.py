@@ -0,0 +1,207 @@
+"""
+Closed-form trajectory of the Silver Meteor train
+The trip is split into the phases train_physics.step() produces, each
+with an exact formula, so position, speed and state at any frame can be
+found without stepping the simulation
+"""
+
+import math
+from bisect import bisect_right
+
+from train_physics import (State, Destination, STATION_NYC_X,
+                           STATION_MIAMI_X, ACCELERATION, MAX_SPEED, EPSILON,
+                           press)
+
+
+def _first(lo, guess, reached):
+    """Smallest whole k >= lo for which reached(k) is true
+
+    guess is the analytic answer; it is nudged to absorb rounding
+    """
+    k = lo if math.isnan(guess) else max(lo, math.ceil(guess - EPSILON))
+    while k > lo and reached(k - 1):
+        k -= 1
+    while not reached(k):
+        k += 1
+    return k
+
+
+def _root(a, b, c):
+    """Root (-b + sqrt(b^2 - 4ac)) / 2a of a*k^2 + b*k + c = 0, or NaN"""
+    disc = b * b - 4 * a * c
+    if disc < 0:
+        return math.nan
+    return (-b + math.sqrt(disc)) / (2 * a)
+
+
+class Trajectory:
+    """Every phase of a run, from a starting condition and button presses
+
+    presses lists the frames on which the multi-function button is
+    clicked, as on_mouse_down() would between two calls of update().
+    Frame t is the state after t updates and any press made at t.
+
+    The formulas round differently from update(), which adds up the
+    speed frame by frame, so both test the ends of phases with the same
+    EPSILON allowance and agree on the frame each one ends on.
+    """
+
+    def __init__(self, presses=(), x=STATION_NYC_X, speed=0,
+                 state=State.STOPPED, target=Destination.MIAMI,
+                 acceleration=ACCELERATION, max_speed=MAX_SPEED):
+        self.acceleration = acceleration
+        self.max_speed = max_speed
+
+        # Each segment is (start frame, state, target, x, speed, first k
+        # checked for a state change); segments are in start order
+        self.segments = []
+        pending = sorted(p for p in presses if p >= 0)
+        segment = (0, state, target, x, speed, 1)
+
+        while True:
+            end, following = self._finish(segment)
+            if pending and (end is None or pending[0] < end):
+                t = pending.pop(0)
+                start, state, target, _, _, _ = segment
+                new_state = press(state)
+                if new_state == state:
+                    continue
+                x, speed, _, _ = self._evaluate(segment, t - start)
+                if t > start:
+                    self.segments.append(segment)
+                segment = (t, new_state, target, x, speed, 1)
+            elif end is None:
+                self.segments.append(segment)
+                break
+            else:
+                self.segments.append(segment)
+                segment = following
+
+        self._starts = [segment[0] for segment in self.segments]
+
+    def _evaluate(self, segment, k):
+        """Return (x, speed, state, target) k frames into a segment"""
+        start, state, target, x0, v0, _ = segment
+        a = self.acceleration
+        direction = 1 if target == Destination.MIAMI else -1
+
+        match state:
+            case State.ACCELERATING:
+                # Speed is added before moving each frame
+                x = x0 + direction * (k * v0 + a * k * (k + 1) / 2)
+                return x, v0 + k * a, state, target
+            case State.CRUISING:
+                return x0 + direction * k * v0, v0, state, target
+            case State.DECELERATING:
+                # The train moves before the speed is taken off
+                x = x0 + direction * (k * v0 - a * k * (k - 1) / 2)
+                return x, v0 - k * a, state, target
+            case State.BRAKING:
+                # Speed is taken off before moving each frame
+                x = x0 + direction * (k * v0 - a * k * (k + 1) / 2)
+                return x, v0 - k * a, state, target
+        return x0, v0, state, target
+
+    def _finish(self, segment):
+        """Return the frame a segment ends on and the segment after it
+
+        Holds at a station or mid-journey never end by themselves, so
+        (None, None) is returned for them
+        """
+        start, state, target, x0, v0, lo = segment
+        a = self.acceleration
+        v_max = self.max_speed
+        if target == Destination.MIAMI:
+            direction = 1
+            remaining = STATION_MIAMI_X - x0
+        else:
+            direction = -1
+            remaining = x0 - STATION_NYC_X
+
+        def position(k):
+            return self._evaluate(segment, k)[0]
+
+        def distance(k):
+            # Signed distance still to run, negative once past the station
+            return remaining - direction * (position(k) - x0)
+
+        match state:
+            case State.ACCELERATING:
+                # Frame on which the speed would reach the limit
+                capped = _first(1, (v_max - v0) / a,
+                                lambda k: v0 + k * a >= v_max - EPSILON)
+
+                # Frame on which the stopping distance is reached
+                onset = _first(
+                    1,
+                    _root(a, 2 * v0 + a / 2, v0 * v0 / (2 * a) - remaining),
+                    lambda k: (distance(k) <=
+                              (v0 + k * a) ** 2 / (2 * a) + EPSILON))
+
+                if onset < capped:
+                    return self._approach(start + onset, target,
+                                          position(onset),
+                                          v0 + onset * a - a)
+
+                # The frame that reaches the limit is already a cruising one
+                x = position(capped - 1)
+                return start + capped, (start + capped, State.CRUISING,
+                                        target, x + direction * v_max,
+                                        v_max, 0)
+
+            case State.CRUISING:
+                onset = _first(
+                    lo, (remaining - v0 * v0 / (2 * a)) / v0,
+                    lambda k: distance(k) <= v0 * v0 / (2 * a) + EPSILON)
+                return self._approach(start + onset, target,
+                                      position(onset), v0 - a)
+
+            case State.DECELERATING:
+                # Stopped by running out of speed or by reaching the station
+                guess = v0 / a
+                passed = _root(-a / 2, v0 + a / 2, -remaining)
+                if passed < guess:
+                    guess = passed
+                stop = _first(lo, guess,
+                              lambda k: (v0 - k * a <= EPSILON or
+                                         distance(k) <= EPSILON))
+                return self._arrive(start + stop, target)
+
+            case State.BRAKING:
+                # The last frame of braking does not move the train
+                stop = _first(1, v0 / a, lambda k: v0 - k * a <= EPSILON)
+                return start + stop, (start + stop, State.PAUSED, target,
+                                      position(stop - 1), 0, 1)
+
+        return None, None
+
+    def _approach(self, t, target, x, speed):
+        """Segment for a train that began its station approach at frame t"""
+        segment = (t, State.DECELERATING, target, x, speed, 0)
+        end, following = self._finish(segment)
+        if end == t:
+            # Arrived on the same frame the approach began
+            return end, following
+        return t, segment
+
+    @staticmethod
+    def _arrive(t, target):
+        """Segment for a train standing at its destination from frame t"""
+        if target == Destination.MIAMI:
+            return t, (t, State.STOPPED, Destination.NYC,
+                       STATION_MIAMI_X, 0, 1)
+        return t, (t, State.STOPPED, Destination.MIAMI, STATION_NYC_X, 0, 1)
+
+    def at(self, t):
+        """Return (x, speed, state, target) at frame t"""
+        i = max(bisect_right(self._starts, t) - 1, 0)
+        segment = self.segments[i]
+        return self._evaluate(segment, max(t - segment[0], 0))
+
+    def next_arrival(self, t):
+        """Return the frame the train next stands at a station, or None"""
+        i = bisect_right(self._starts, t)
+        for segment in self.segments[i:]:
+            if segment[1] == State.STOPPED:
+                return segment[0]
+        return None
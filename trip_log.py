@@ -0,0 +1,129 @@
+"""
+Columnar trip log of the train, read back through memory maps
+A log is a directory with one file per column, each a flat array of
+native binary values, plus an index of the rows where the state changed.
+Reading maps the files, so any row of a log of any size is found without
+loading the rest of it
+"""
+
+import atexit
+import mmap
+import os
+from array import array
+from bisect import bisect_right
+
+from train_physics import (STATES, STATE_CODES, DESTINATIONS,
+                           DESTINATION_CODES)
+
+# Column name -> array typecode; one file of each in a log directory
+COLUMNS = {
+    "tick": "q",  # Physics steps since the simulator started
+    "x": "d",
+    "speed": "d",
+    "state": "B",  # Index into train_physics.STATES
+    "target": "B",  # Index into DESTINATIONS
+    "changes": "q",  # Rows where the state is not the previous row's
+}
+
+FLUSH_ROWS = 4096  # Rows buffered before they are written out
+
+
+class TripLog:
+    """Appends rows to a log directory, creating it if need be
+
+    Rows are written out in batches, and the last ones at exit.
+    Adding to an existing log carries on its ticks: a new run's ticks,
+    which start again from 0, are counted from just after the last tick
+    logged, so the ticks of a log always run in order.
+    """
+
+    def __init__(self, path):
+        os.makedirs(path, exist_ok=True)
+        self.files = {name: open(os.path.join(path, name), "ab")
+                      for name in COLUMNS}
+        self.pending = {name: array(code) for name, code in COLUMNS.items()}
+        self.rows = os.path.getsize(os.path.join(path, "tick")) // 8
+        self.last_tick = -1
+        if self.rows:
+            last = array("q")
+            with open(os.path.join(path, "tick"), "rb") as f:
+                f.seek((self.rows - 1) * last.itemsize)
+                last.fromfile(f, 1)
+            self.last_tick = last[0]
+        self.offset = self.last_tick + 1  # Added to the ticks of this run
+        self.last_state = None
+        atexit.register(self.close)
+
+    def append(self, tick, x, speed, state, target):
+        tick += self.offset
+        if tick < self.last_tick:
+            raise ValueError(f"tick {tick - self.offset} is before the last "
+                             "one added")
+        self.last_tick = tick
+        code = STATE_CODES[state]
+        if code != self.last_state:
+            self.pending["changes"].append(self.rows)
+            self.last_state = code
+        self.pending["tick"].append(tick)
+        self.pending["x"].append(x)
+        self.pending["speed"].append(speed)
+        self.pending["state"].append(code)
+        self.pending["target"].append(DESTINATION_CODES[target])
+        self.rows += 1
+        if len(self.pending["tick"]) >= FLUSH_ROWS:
+            self.flush()
+
+    def flush(self):
+        for name, values in self.pending.items():
+            values.tofile(self.files[name])
+            del values[:]
+            self.files[name].flush()
+
+    def close(self):
+        if not self.files["tick"].closed:
+            self.flush()
+            for f in self.files.values():
+                f.close()
+
+
+class TripLogView:
+    """Read-only view of a log; columns are memoryviews over the maps"""
+
+    def __init__(self, path):
+        self.maps = []
+        for name, code in COLUMNS.items():
+            with open(os.path.join(path, name), "rb") as f:
+                if os.fstat(f.fileno()).st_size:
+                    data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    self.maps.append(data)
+                else:
+                    data = b""
+            setattr(self, name, memoryview(data).cast(code))
+
+    def __len__(self):
+        return len(self.tick)
+
+    def row(self, i):
+        """Return (tick, x, speed, State, Destination) of row i"""
+        return (self.tick[i], self.x[i], self.speed[i],
+                STATES[self.state[i]], DESTINATIONS[self.target[i]])
+
+    def row_at(self, tick):
+        """Index of the last row logged at or before tick"""
+        return max(bisect_right(self.tick, tick) - 1, 0)
+
+    def next_change(self, i):
+        """First row after row i where the state changes, or the last row"""
+        j = bisect_right(self.changes, i)
+        return self.changes[j] if j < len(self.changes) else len(self) - 1
+
+    def previous_change(self, i):
+        """Last row before row i where the state changed, or row 0"""
+        j = bisect_right(self.changes, i - 1) - 1
+        return self.changes[j] if j >= 0 else 0
+
+    def close(self):
+        for name in COLUMNS:
+            getattr(self, name).release()
+        for data in self.maps:
+            data.close()